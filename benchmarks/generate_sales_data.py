@@ -0,0 +1,144 @@
+"""
+Synthetic sales data generator.
+
+Writes files in the same pipe-delimited format as data/sales_data.txt, at
+any scale, including the dirt parse_transactions and validation handle:
+thousands separators, commas in product names, zero quantities, negative
+prices, missing customer IDs / regions and bad transaction IDs.
+
+Usage:
+    python -m benchmarks.generate_sales_data OUTPUT --rows 1000000
+"""
+
+import argparse
+import datetime
+import random
+
+
+HEADER = "TransactionID|Date|ProductID|ProductName|Quantity|UnitPrice|CustomerID|Region\n"
+
+# (ProductID, base name, name variants, typical unit price)
+PRODUCTS = [
+    ("P101", "Laptop", ["Laptop,Premium"], 60000),
+    ("P102", "Mouse", ["Mouse,Wireless"], 900),
+    ("P103", "Keyboard", ["Keyboard,Mechanical"], 2500),
+    ("P104", "Monitor", ["Monitor,LED"], 12000),
+    ("P105", "Webcam", ["Webcam,HD"], 3000),
+    ("P106", "Headphones", [], 4000),
+    ("P107", "USB Cable", [], 300),
+    ("P108", "External Hard Drive", ["External Hard Drive,1TB"], 5000),
+    ("P109", "Wireless Mouse", ["Wireless Mouse,Gaming"], 800),
+    ("P110", "Laptop Charger", ["Laptop Charger,65W"], 2000),
+]
+
+REGIONS = ["North", "South", "East", "West"]
+
+# Relative frequency of each kind of dirty row
+DIRT_KINDS = [
+    "zero_quantity", "negative_price", "missing_customer",
+    "missing_region", "bad_transaction_id", "bad_product_id", "malformed"
+]
+
+
+def _format_price(price, rng, thousands_rate):
+    """
+    Formats a unit price, sometimes with a thousands separator (1,916).
+    """
+    if price >= 1000 and rng.random() < thousands_rate:
+        return f"{price:,}"
+    return str(price)
+
+
+def iter_sales_rows(rows, seed=42, dirty_rate=0.1, customers=None,
+                    start_date="2024-01-01", days=365, variant_rate=0.2,
+                    thousands_rate=0.1):
+    """
+    Yields synthetic pipe-delimited sales lines (with trailing newline).
+    """
+
+    rng = random.Random(seed)
+    customers = customers or max(25, rows // 20)
+    first_day = datetime.date.fromisoformat(start_date)
+    dates = [(first_day + datetime.timedelta(days=d)).isoformat() for d in range(days)]
+
+    for i in range(1, rows + 1):
+        product_id, name, variants, base_price = rng.choice(PRODUCTS)
+        if variants and rng.random() < variant_rate:
+            name = rng.choice(variants)
+
+        transaction_id = f"T{i:03d}"
+        date = rng.choice(dates)
+        quantity = rng.randint(1, 10)
+        price = max(1, int(base_price * rng.uniform(0.5, 1.5)))
+        customer_id = f"C{rng.randint(1, customers):03d}"
+        region = rng.choice(REGIONS)
+
+        if rng.random() < dirty_rate:
+            kind = rng.choice(DIRT_KINDS)
+            if kind == "zero_quantity":
+                quantity = 0
+            elif kind == "negative_price":
+                price = -price
+            elif kind == "missing_customer":
+                customer_id = ""
+            elif kind == "missing_region":
+                region = ""
+            elif kind == "bad_transaction_id":
+                transaction_id = f"X{i}"
+            elif kind == "bad_product_id":
+                product_id = product_id.replace("P", "Q")
+            else:
+                yield f"{transaction_id}|{date}|{product_id}|{name}\n"
+                continue
+
+        price_text = _format_price(price, rng, thousands_rate) if price > 0 else str(price)
+        yield (
+            f"{transaction_id}|{date}|{product_id}|{name}|{quantity}|"
+            f"{price_text}|{customer_id}|{region}\n"
+        )
+
+
+def generate_sales_data(filename, rows, batch_size=100000, **options):
+    """
+    Writes a synthetic sales file with a header and rows data rows.
+
+    Rows are generated and written in batches, so any size fits in memory.
+    options are passed to iter_sales_rows.
+
+    Returns: filename
+    """
+
+    batch = []
+    with open(filename, "w", encoding="utf-8", buffering=1 << 20) as f:
+        f.write(HEADER)
+        for line in iter_sales_rows(rows, **options):
+            batch.append(line)
+            if len(batch) >= batch_size:
+                f.write("".join(batch))
+                batch = []
+        f.write("".join(batch))
+
+    return filename
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic sales data")
+    parser.add_argument("output", help="file to write")
+    parser.add_argument("--rows", type=int, default=10000, help="number of data rows")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--dirty-rate", type=float, default=0.1,
+                        help="fraction of rows with a data problem")
+    parser.add_argument("--customers", type=int, default=None,
+                        help="distinct customers (default rows / 20)")
+    parser.add_argument("--days", type=int, default=365, help="distinct dates")
+    args = parser.parse_args()
+
+    generate_sales_data(
+        args.output, args.rows, seed=args.seed, dirty_rate=args.dirty_rate,
+        customers=args.customers, days=args.days
+    )
+    print(f"Wrote {args.rows} rows to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
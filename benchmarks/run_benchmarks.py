@@ -0,0 +1,234 @@
+"""
+Benchmark suite for every pipeline stage.
+
+Times (wall and CPU) and memory-profiles each stage on synthetic data and
+writes the results as JSON. Pass --baseline with an earlier results file
+to fail on regressions.
+
+Usage:
+    python -m benchmarks.run_benchmarks --rows 100000 --output bench.json
+    python -m benchmarks.run_benchmarks --rows 100000 --baseline bench.json
+"""
+
+import argparse
+import contextlib
+import datetime
+import io
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks.generate_sales_data import PRODUCTS, generate_sales_data
+from utils.api_handler import create_product_mapping, enrich_sales_data
+from utils.cube import build_sales_cube, cube_rollup, rolling_revenue
+from utils.query import group_by, new_query_engine
+from utils.data_processor import (
+    aggregate_sales,
+    analyze_sales,
+    calculate_total_revenue,
+    customer_analysis,
+    daily_sales_trend,
+    find_peak_sales_day,
+    low_performing_products,
+    region_wise_sales,
+    top_selling_products
+)
+from utils.file_handler import (
+    parse_transactions,
+    read_sales_data,
+    save_enriched_data,
+    stream_sales_file,
+    validate_and_filter
+)
+
+
+def _synthetic_catalog():
+    """
+    Product catalog shaped like the API response, for offline enrichment.
+    """
+    return [
+        {
+            "id": int(product_id[1:]),
+            "title": name,
+            "category": "electronics",
+            "brand": "Generic",
+            "price": price,
+            "rating": 4.0
+        }
+        for product_id, name, _, price in PRODUCTS
+    ]
+
+
+def measure(name, func, rows, repeat=3, memory=True):
+    """
+    Runs func repeat times and records the best wall / CPU time, then once
+    more under tracemalloc for the peak Python allocation. rows=None
+    counts the rows in the result.
+
+    Returns: (result of the last call, metrics dict)
+    """
+
+    best_wall = best_cpu = None
+    result = None
+
+    for _ in range(repeat):
+        with contextlib.redirect_stdout(io.StringIO()):
+            wall, cpu = time.perf_counter(), time.process_time()
+            result = func()
+            wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+        best_wall = wall if best_wall is None else min(best_wall, wall)
+        best_cpu = cpu if best_cpu is None else min(best_cpu, cpu)
+
+    peak = None
+    if memory:
+        tracemalloc.start()
+        with contextlib.redirect_stdout(io.StringIO()):
+            func()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    if rows is None:
+        rows = len(result)
+
+    return result, {
+        "stage": name,
+        "rows": rows,
+        "wall_s": round(best_wall, 6),
+        "cpu_s": round(best_cpu, 6),
+        "peak_mem_bytes": peak,
+        "rows_per_s": round(rows / best_wall) if best_wall else None
+    }
+
+
+def run_suite(filename, repeat=3, memory=True):
+    """
+    Benchmarks every stage of the pipeline on one input file.
+
+    Returns: list of metrics dicts, one per stage
+    """
+
+    results = []
+
+    def stage(name, func, rows):
+        result, metrics = measure(name, func, rows, repeat, memory)
+        results.append(metrics)
+        print(f"{name:<32} {metrics['wall_s']:>10.4f}s  {metrics['rows_per_s'] or 0:>12,} rows/s")
+        return result
+
+    raw_lines = stage("read", lambda: read_sales_data(filename), None)
+    rows = len(raw_lines)
+
+    transactions = stage("parse", lambda: parse_transactions(raw_lines), rows)
+    stage("parse_compact", lambda: parse_transactions(raw_lines, compact=True), rows)
+
+    valid, _, _ = stage(
+        "validate_filter", lambda: validate_and_filter(transactions), len(transactions)
+    )
+    n = len(valid)
+
+    # --- Analysis: each function on its own, then the shared single pass ---
+    for func in (
+        calculate_total_revenue, region_wise_sales, top_selling_products,
+        customer_analysis, daily_sales_trend, find_peak_sales_day,
+        low_performing_products
+    ):
+        stage(func.__name__, lambda func=func: func(valid), n)
+
+    aggregates = stage("aggregate_sales", lambda: aggregate_sales(valid), n)
+    # peak_mem_bytes of the two passes compares exact sets with HLL sketches
+    stage("aggregate_sales (distinct=hll)", lambda: aggregate_sales(valid, distinct='hll'), n)
+    stage("analyze_sales (from aggregates)", lambda: analyze_sales(aggregates), n)
+    stage("stream_sales_file", lambda: stream_sales_file(filename), rows)
+
+    cube = stage("build_sales_cube", lambda: build_sales_cube(valid), n)
+    stage("cube_rollup (month x region)", lambda: cube_rollup(cube, 'month', by=('region',)), n)
+    stage("rolling_revenue (7 days)", lambda: rolling_revenue(cube, 7), n)
+
+    # A fresh engine per run: one scan, then a rollup of the memoized grouping
+    stage("group_by (scan)", lambda: group_by(
+        new_query_engine(valid), ('Region', 'ProductName')), n)
+    engine = new_query_engine(valid)
+    group_by(engine, ('Region', 'ProductName'))
+    stage("group_by (from memoized)", lambda: group_by(engine, ('Region',)), n)
+
+    mapping = create_product_mapping(_synthetic_catalog())
+    enriched = stage("enrich", lambda: enrich_sales_data(valid, mapping), n)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        output = os.path.join(tmp, "enriched.txt")
+        stage("save", lambda: save_enriched_data(enriched, output), n)
+
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """
+    Finds stages whose wall time grew by more than tolerance vs baseline.
+
+    Returns: list of (stage, baseline_s, current_s)
+    """
+
+    previous = {r["stage"]: r for r in baseline["results"]}
+    regressions = []
+
+    for r in results:
+        old = previous.get(r["stage"])
+        if old and old["wall_s"] and r["wall_s"] > old["wall_s"] * (1 + tolerance):
+            regressions.append((r["stage"], old["wall_s"], r["wall_s"]))
+
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the sales pipeline")
+    parser.add_argument("--rows", type=int, default=100000,
+                        help="synthetic rows to generate")
+    parser.add_argument("--input", help="benchmark an existing file instead")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per stage")
+    parser.add_argument("--no-memory", action="store_true",
+                        help="skip the tracemalloc run per stage")
+    parser.add_argument("--output", help="write JSON results here")
+    parser.add_argument("--baseline", help="earlier JSON results to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="allowed slowdown vs baseline (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        filename = args.input
+        if filename is None:
+            filename = os.path.join(tmp, "sales_data.txt")
+            generate_sales_data(filename, args.rows)
+
+        results = run_suite(filename, repeat=args.repeat, memory=not args.no_memory)
+
+    report = {
+        "meta": {
+            "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "input": args.input or f"synthetic:{args.rows}",
+            "repeat": args.repeat
+        },
+        "results": results
+    }
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Results saved to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for name, old, new in regressions:
+            print(f"REGRESSION {name}: {old:.4f}s → {new:.4f}s")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,120 +1,571 @@
-def main():
+import argparse
+import io
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.api_handler import (
+    create_product_mapping,
+    enrich_sales_data,
+    fetch_all_products,
+    new_product_dimension,
+    product_dimension_summary,
+    resolve_product
+)
+from utils.checkpoint import CHECKPOINT_FILE, stream_sales_file_incremental
+from utils.data_processor import (
+    aggregate_sales,
+    calculate_total_revenue,
+    customer_analysis,
+    daily_sales_trend,
+    find_peak_sales_day,
+    low_performing_products,
+    region_wise_sales,
+    top_selling_products
+)
+from utils.file_handler import (
+    is_valid_transaction,
+    new_filter_summary,
+    parse_transactions,
+    read_sales_data,
+    resolve_sales_inputs,
+    save_enriched_data,
+    validate_transactions
+)
+from utils.indexing import filter_transactions, transaction_overview
+from utils.metrics import new_run_metrics, save_metrics, track_stage
+from utils.report_generator import generate_sales_report, write_sales_report
+from utils.result_cache import (
+    RESULT_CACHE_DIR,
+    RESULT_CACHE_MAX_BYTES,
+    file_digest,
+    load_cached_result,
+    read_artifacts,
+    restore_artifacts,
+    result_cache_key,
+    save_cached_result
+)
+from utils.segments import (
+    aggregate_segments,
+    cross_segments,
+    load_segment_file,
+    parse_segment_spec,
+    save_segment_summary,
+    segment_file_name
+)
+from utils.sqlite_store import load_product_catalog, load_transactions, open_sales_db
+from utils.validation import QUARANTINE_FILE, open_quarantine
+
+
+SALES_FILE = "data/sales_data.txt"
+METRICS_FILE = "output/run_metrics.json"
+SEGMENT_DIR = "output/segments"
+ENRICHED_FILE = "data/enriched_sales_data.txt"
+REPORT_FILE = "output/sales_report.txt"
+
+
+def parse_args(argv=None):
+    """
+    Parses command line options.
+    """
+
+    parser = argparse.ArgumentParser(description="Sales Analytics System")
+    parser.add_argument("--input", default=SALES_FILE,
+                        help="sales data file, or a directory / glob of partition files")
+    parser.add_argument("--metrics-file", default=METRICS_FILE,
+                        help="where to write per-stage metrics JSON")
+    parser.add_argument("--trace-memory", action="store_true",
+                        help="measure per-stage peak allocations with tracemalloc")
+    parser.add_argument("--profile-stage", metavar="STAGE",
+                        help="run one stage (e.g. parse, analysis, enrich) under cProfile")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="always recompute instead of reusing cached results")
+    parser.add_argument("--cache-dir", default=RESULT_CACHE_DIR,
+                        help="where cached results are kept")
+    parser.add_argument("--db", metavar="PATH",
+                        help="also store every valid row (ignoring filters) and the catalog "
+                             "in this SQLite database")
+    parser.add_argument("--cache-max-mb", type=float,
+                        default=RESULT_CACHE_MAX_BYTES / (1024 * 1024),
+                        help="evict least recently used results beyond this size")
+    parser.add_argument("--incremental", action="store_true",
+                        help="only read rows appended since the last run (no prompts; "
+                             "writes the report, not the enriched file)")
+    parser.add_argument("--checkpoint-file", default=CHECKPOINT_FILE,
+                        help="where --incremental keeps its state (one file per partition)")
+
+    batch = parser.add_argument_group("batch mode (no prompts)")
+    batch.add_argument("--batch", action="store_true",
+                       help="never prompt; implied by any option below")
+    batch.add_argument("--region", help="filter all data to one region")
+    batch.add_argument("--min-amount", type=float, help="filter: minimum amount")
+    batch.add_argument("--max-amount", type=float, help="filter: maximum amount")
+    batch.add_argument("--segment", action="append", default=[],
+                       metavar="NAME:region=R,min=A,max=B",
+                       help="named segment to report on (repeatable)")
+    batch.add_argument("--segment-file", help="JSON list of segment specs")
+    batch.add_argument("--regions", help="comma-separated regions to segment by")
+    batch.add_argument("--amount-bands",
+                       help="comma-separated amount bands to segment by, e.g. 0-1000,1000- "
+                            "(lower bound inclusive, upper bound exclusive)")
+    batch.add_argument("--segment-dir", default=SEGMENT_DIR,
+                       help="where to write per-segment reports")
+
+    args = parser.parse_args(argv)
+    if args.incremental and (args.db or args.segment or args.segment_file
+                             or args.regions or args.amount_bands):
+        parser.error("--incremental keeps aggregates only; --db and segments need the rows")
+    args.batch = args.batch or args.incremental or any([
+        args.region, args.min_amount is not None, args.max_amount is not None,
+        args.segment, args.segment_file, args.regions, args.amount_bands
+    ])
+    return args
+
+
+def build_segments(args):
+    """
+    Collects the segment specs given on the command line.
+    """
+
+    segments = [parse_segment_spec(spec) for spec in args.segment]
+    if args.segment_file:
+        segments += load_segment_file(args.segment_file)
+    if args.regions or args.amount_bands:
+        segments += cross_segments(
+            args.regions.split(",") if args.regions else [],
+            args.amount_bands.split(",") if args.amount_bands else []
+        )
+    return segments
+
+
+def batch_filters(args):
+    """
+    The filters given on the command line, or {} when there are none.
+    """
+
+    if not args.region and args.min_amount is None and args.max_amount is None:
+        return {}
+    return {
+        'region': args.region or None,
+        'min_amount': args.min_amount,
+        'max_amount': args.max_amount
+    }
+
+
+def validate_and_analyze(transactions, parsed, metrics):
+    """
+    Runs validation and analysis (steps 4-5) on the filtered transactions.
+
+    parsed holds the step 2 results; its unparseable lines are counted and
+    quarantined along with the rows that fail validation.
+
+    Returns: (valid transactions, aggregates)
+    """
+
+    # ----------------------------------------------------
+    # [4/10] VALIDATION
+    # ----------------------------------------------------
+    print("[4/10] Validating transactions...")
+    reasons = dict(parsed['summary']['invalid_reasons'])
+    with track_stage(metrics, "validate", rows=len(transactions)):
+        with open_quarantine(QUARANTINE_FILE) as quarantine:
+            quarantine.write(parsed['rejects'])
+            valid, invalid = validate_transactions(transactions, quarantine, reasons)
+    invalid_count = len(invalid) + parsed['summary']['invalid']
+    print(f"✓ Valid: {len(valid)} | Invalid: {invalid_count}")
+    for reason, count in sorted(reasons.items(), key=lambda item: -item[1]):
+        print(f"  {reason}: {count}")
+    print(f"✓ Rejected rows saved to: {QUARANTINE_FILE}\n")
+
+    # Use only valid transactions for analysis
+    transactions = valid
+
+    # ----------------------------------------------------
+    # [5/10] ANALYSIS
+    # ----------------------------------------------------
+    print("[5/10] Analyzing sales data...")
+    with track_stage(metrics, "analysis", rows=len(transactions)) as stage:
+        # Single aggregation pass; each analysis below is a view over it
+        with track_stage(metrics, "aggregate_sales", len(transactions), parent=stage):
+            aggregates = aggregate_sales(transactions)
+
+        for func, kwargs in (
+            (calculate_total_revenue, {}), (region_wise_sales, {}),
+            (top_selling_products, {'n': 5}), (customer_analysis, {'n': 5}),
+            (daily_sales_trend, {}), (find_peak_sales_day, {}),
+            (low_performing_products, {})
+        ):
+            with track_stage(metrics, func.__name__, parent=stage):
+                _ = func(aggregates, **kwargs)
+    print("✓ Analysis complete\n")
+
+    return transactions, aggregates
+
+
+def join_catalog_fetch(future, messages):
+    """
+    Waits for the background catalog fetch started by main and prints its
+    status messages, which the fetch thread collects in messages instead
+    of printing mid-step.
+
+    fetch_all_products applies its own request timeouts and falls back to
+    the cache or an empty catalog; anything unexpected also gives [].
+
+    Returns: list of products
+    """
+    try:
+        products = future.result()
+    except Exception as e:
+        messages.append(f"Failed to fetch products: {e}")
+        products = []
+
+    for message in messages:
+        print(message)
+    return products
+
+
+def enrich_and_report(transactions, aggregates, api_products, metrics):
+    """
+    Runs enrichment, saving and the report (steps 7-9).
+
+    Returns: (enriched transactions, enrichment summary)
+    """
+
+    # ----------------------------------------------------
+    # [7/10] ENRICH SALES DATA
+    # ----------------------------------------------------
+    print("[7/10] Enriching sales data...")
+    with track_stage(metrics, "enrich", rows=len(transactions)):
+        product_mapping = create_product_mapping(api_products)
+        dimension = new_product_dimension(product_mapping)
+        enriched_transactions = enrich_sales_data(transactions, product_mapping, dimension)
+
+    # Match statistics come from the per-product dimension, not the rows
+    enrichment = product_dimension_summary(dimension)
+    success_rate = (enrichment['enriched'] / enrichment['total']) * 100 if enrichment['total'] else 0.0
+    print(f"✓ Enriched {enrichment['enriched']}/{enrichment['total']} transactions ({success_rate:.1f}%)\n")
+
+    # ----------------------------------------------------
+    # [8/10] SAVE ENRICHED DATA
+    # ----------------------------------------------------
+    print("[8/10] Saving enriched data...")
+    with track_stage(metrics, "save", rows=len(enriched_transactions)):
+        save_enriched_data(enriched_transactions, ENRICHED_FILE)
+    print(f"✓ Saved to: {ENRICHED_FILE}\n")
+
+    # ----------------------------------------------------
+    # [9/10] GENERATE REPORT
+    # ----------------------------------------------------
+    print("[9/10] Generating report...")
+    with track_stage(metrics, "report", rows=len(transactions)):
+        generate_sales_report(
+            transactions, enriched_transactions, REPORT_FILE,
+            aggregates=aggregates, enrichment=enrichment
+        )
+    print(f"✓ Report saved to: {REPORT_FILE}\n")
+
+    return enriched_transactions, enrichment
+
+
+def run_incremental(args, metrics, catalog_future, catalog_messages):
+    """
+    Steps 1-9 for --incremental: only rows appended since the last run are
+    read (see utils.checkpoint), and the report is written from the
+    checkpointed aggregates. There are no rows to save or cache, so the
+    enriched file and the result cache are skipped.
+    """
+
+    # ----------------------------------------------------
+    # [1/10]-[5/10] READ, VALIDATE & ANALYZE NEW ROWS
+    # ----------------------------------------------------
+    print("[1/10]-[5/10] Reading new rows since the last checkpoint...")
+    filters = {
+        'region': args.region,
+        'min_amount': args.min_amount,
+        'max_amount': args.max_amount
+    }
+    with track_stage(metrics, "incremental") as stage:
+        aggregates, summary, info = stream_sales_file_incremental(
+            args.input, checkpoint_file=args.checkpoint_file, **filters
+        )
+        stage['rows'] = summary['total_input']
+
+    resumed = sum(1 for part in info['files'].values() if part['mode'] == 'incremental')
+    print(f"✓ Resumed {resumed}/{len(info['files'])} files, "
+          f"read {info['bytes_processed']:,} new bytes")
+    print(f"✓ Valid: {summary['total_input'] - summary['invalid']} | Invalid: {summary['invalid']}")
+    for reason, count in sorted(summary['invalid_reasons'].items(), key=lambda item: -item[1]):
+        print(f"  {reason}: {count}")
+    print(f"✓ Filtered out: {summary['filtered_by_region']} by region, "
+          f"{summary['filtered_by_amount']} by amount")
+    print(f"✓ Analyzing {aggregates['transaction_count']} records\n")
+
+    # ----------------------------------------------------
+    # [6/10] FETCH API PRODUCTS
+    # ----------------------------------------------------
+    print("[6/10] Fetching product data from API...")
+    with track_stage(metrics, "fetch_products_wait") as stage:
+        api_products = join_catalog_fetch(catalog_future, catalog_messages)
+        stage['rows'] = len(api_products)
+    print(f"✓ Fetched {len(api_products)} products\n")
+
+    # ----------------------------------------------------
+    # [7/10] ENRICHMENT SUMMARY
+    # ----------------------------------------------------
+    print("[7/10] Matching products against the catalog...")
+    with track_stage(metrics, "enrich", rows=len(info['product_rows'])):
+        # The checkpoint keeps row counts per ProductID, so match statistics
+        # come from resolving each product once
+        dimension = new_product_dimension(create_product_mapping(api_products))
+        for product_id, count in info['product_rows'].items():
+            resolve_product(dimension, product_id)
+            dimension['rows'][product_id] = count
+        enrichment = product_dimension_summary(dimension)
+    success_rate = (enrichment['enriched'] / enrichment['total']) * 100 if enrichment['total'] else 0.0
+    print(f"✓ Enriched {enrichment['enriched']}/{enrichment['total']} transactions ({success_rate:.1f}%)\n")
+
+    print("[8/10] Skipped: incremental runs do not rewrite the enriched data file\n")
+
+    # ----------------------------------------------------
+    # [9/10] GENERATE REPORT
+    # ----------------------------------------------------
+    print("[9/10] Generating report...")
+    with track_stage(metrics, "report", rows=aggregates['transaction_count']):
+        write_sales_report(aggregates, enrichment, REPORT_FILE)
+    print(f"✓ Report saved to: {REPORT_FILE}\n")
+
+
+def complete_run(args, metrics):
+    """
+    Step 10: saves the run metrics.
+    """
+
+    # ----------------------------------------------------
+    # [10/10] COMPLETE
+    # ----------------------------------------------------
+    save_metrics(metrics, args.metrics_file)
+    print("[10/10] Process Complete!")
+    print(f"Metrics saved to: {args.metrics_file}")
+    print("========================================")
+
+
+def main(argv=None):
     """
     Main execution function for the Sales Analytics System.
     """
 
+    args = parse_args(argv)
+    metrics = new_run_metrics(
+        trace_memory=args.trace_memory, profile_stage=args.profile_stage
+    )
+    use_cache = not args.no_cache
+    cache_max_bytes = int(args.cache_max_mb * 1024 * 1024)
+
     print("========================================")
     print("        SALES ANALYTICS SYSTEM")
     print("========================================\n")
 
+    # Start the catalog fetch now so the network round-trip overlaps with
+    # reading, parsing and analysis; it is joined at step 6
+    fetcher = ThreadPoolExecutor(max_workers=1, thread_name_prefix="catalog-fetch")
+    catalog_messages = []
+    catalog_future = fetcher.submit(fetch_all_products, log=catalog_messages.append)
+
     try:
+        if args.incremental:
+            run_incremental(args, metrics, catalog_future, catalog_messages)
+            complete_run(args, metrics)
+            return
+
+        # Cache entries saved by this run; its own saves never evict them
+        written = set()
+        input_digest = api_products = run_key = None
+        if use_cache:
+            with track_stage(metrics, "input_digest"):
+                input_digest = result_cache_key(*(
+                    file_digest(f) for f in resolve_sales_inputs(args.input)
+                    if os.path.isfile(f)
+                ))
+
+        # Batch runs know every option up front, so a run with the same
+        # input, filters, catalog and segments is restored from its output
+        # files without touching the rows (--db needs the rows)
+        if use_cache and args.batch and not args.db:
+            print("Checking for a cached run with the same inputs...")
+            with track_stage(metrics, "fetch_products_wait") as stage:
+                api_products = join_catalog_fetch(catalog_future, catalog_messages)
+                stage['rows'] = len(api_products)
+            run_key = result_cache_key(
+                "run", input_digest, batch_filters(args), api_products, build_segments(args)
+            )
+            cached = load_cached_result(run_key, args.cache_dir)
+            if cached is not None:
+                with track_stage(metrics, "restore_cached"):
+                    restore_artifacts(cached['artifacts'])
+                print("✓ Input, filters and catalog unchanged, restored:")
+                for path in cached['artifacts']:
+                    print(f"  {path}")
+                print()
+                complete_run(args, metrics)
+                return
+            print("✓ No cached run found\n")
+
         # ----------------------------------------------------
         # READ SALES DATA
         # ----------------------------------------------------
         print("[1/10] Reading sales data...")
-        raw_data = load_sales_data("sales_data.txt")
-        print(f"✓ Successfully read {len(raw_data)} transactions\n")
+        parsed = None
+        if use_cache:
+            parsed_key = result_cache_key("parsed", input_digest)
+            parsed = load_cached_result(parsed_key, args.cache_dir)
+
+        if parsed is None:
+            with track_stage(metrics, "read") as stage:
+                raw_data = read_sales_data(args.input)
+                stage['rows'] = len(raw_data)
+            print(f"✓ Successfully read {len(raw_data)} transactions\n")
+        else:
+            print("✓ Input unchanged since a previous run, using cached records\n")
 
         # ----------------------------------------------------
         # [2/10] PARSE & CLEAN
         # ----------------------------------------------------
         print("[2/10] Parsing and cleaning data...")
-        transactions = parse_transactions(raw_data)
-        print(f"✓ Parsed {len(transactions)} records\n")
+        if parsed is None:
+            # Unparseable lines are kept (with reason codes) for the
+            # quarantine file written at step 4
+            rejects = io.StringIO()
+            parse_summary = new_filter_summary()
+            with track_stage(metrics, "parse", rows=len(raw_data)):
+                transactions = parse_transactions(
+                    raw_data, summary=parse_summary, quarantine=rejects
+                )
+            parsed = {
+                'transactions': transactions,
+                'summary': parse_summary,
+                'rejects': rejects.getvalue()
+            }
+            if use_cache:
+                written.add(save_cached_result(
+                    parsed_key, parsed, args.cache_dir, cache_max_bytes, keep=written
+                ))
+        transactions = parsed['transactions']
+        print(f"✓ Parsed {len(transactions)} records")
+        print(f"✓ Unparseable rows: {parsed['summary']['invalid']}\n")
 
         # ----------------------------------------------------
         # [3/10] FILTER OPTIONS
         # ----------------------------------------------------
         print("[3/10] Filter Options Available:")
 
-        regions = sorted({t["Region"] for t in transactions})
+        with track_stage(metrics, "overview", rows=len(transactions)):
+            # One linear pass; a single filter below is a plain scan too
+            regions, amount_range = transaction_overview(transactions)
+
         print("Regions:", ", ".join(regions))
 
-        amounts = [t["UnitPrice"] * t["Quantity"] for t in transactions]
-        print(f"Amount Range: ₹{min(amounts):,.0f} - ₹{max(amounts):,.0f}\n")
+        min_amount, max_amount = amount_range or (0.0, 0.0)
+        print(f"Amount Range: ₹{min_amount:,.0f} - ₹{max_amount:,.0f}\n")
 
-        choice = input("Do you want to filter data? (y/n): ").strip().lower()
-        print()
+        if args.batch:
+            filters = batch_filters(args)
+        else:
+            filters = {}
+            choice = input("Do you want to filter data? (y/n): ").strip().lower()
+            print()
 
-        if choice == "y":
-            region = input("Enter region to filter (or press Enter to skip): ").strip()
-            min_amt = input("Minimum amount (or press Enter): ").strip()
-            max_amt = input("Maximum amount (or press Enter): ").strip()
+            if choice == "y":
+                region = input("Enter region to filter (or press Enter to skip): ").strip()
+                min_amt = input("Minimum amount (or press Enter): ").strip()
+                max_amt = input("Maximum amount (or press Enter): ").strip()
 
-            min_amt = float(min_amt) if min_amt else None
-            max_amt = float(max_amt) if max_amt else None
+                filters = {
+                    'region': region if region else None,
+                    'min_amount': float(min_amt) if min_amt else None,
+                    'max_amount': float(max_amt) if max_amt else None
+                }
 
-            transactions = filter_transactions(
-                transactions,
-                region=region if region else None,
-                min_amount=min_amt,
-                max_amount=max_amt
-            )
+        if filters:
+            with track_stage(metrics, "filter", rows=len(transactions)):
+                transactions = filter_transactions(transactions, **filters)
 
             print(f"✓ Filter applied. Remaining records: {len(transactions)}\n")
 
-        # ----------------------------------------------------
-        # [4/10] VALIDATION
-        # ----------------------------------------------------
-        print("[4/10] Validating transactions...")
-        valid, invalid = validate_transactions(transactions)
-        print(f"✓ Valid: {len(valid)} | Invalid: {len(invalid)}\n")
-
-        # Use only valid transactions for analysis
-        transactions = valid
-
-        # ----------------------------------------------------
-        # [5/10] ANALYSIS
-        # ----------------------------------------------------
-        print("[5/10] Analyzing sales data...")
-        _ = calculate_total_revenue(transactions)
-        _ = region_wise_sales(transactions)
-        _ = top_selling_products(transactions)
-        _ = customer_analysis(transactions)
-        _ = daily_sales_trend(transactions)
-        _ = find_peak_sales_day(transactions)
-        _ = low_performing_products(transactions)
-        print("✓ Analysis complete\n")
+        transactions, aggregates = validate_and_analyze(transactions, parsed, metrics)
 
         # ----------------------------------------------------
         # [6/10] FETCH API PRODUCTS
         # ----------------------------------------------------
         print("[6/10] Fetching product data from API...")
-        api_products = fetch_all_products()
+        if api_products is None:
+            with track_stage(metrics, "fetch_products_wait") as stage:
+                api_products = join_catalog_fetch(catalog_future, catalog_messages)
+                stage['rows'] = len(api_products)
         print(f"✓ Fetched {len(api_products)} products\n")
 
-        # ----------------------------------------------------
-        # [7/10] ENRICH SALES DATA
-        # ----------------------------------------------------
-        print("[7/10] Enriching sales data...")
-        product_mapping = create_product_mapping(api_products)
-        enriched_transactions = enrich_sales_data(transactions, product_mapping)
+        enriched_transactions, enrichment = enrich_and_report(
+            transactions, aggregates, api_products, metrics
+        )
+        outputs = [QUARANTINE_FILE, ENRICHED_FILE, REPORT_FILE]
 
-        enriched_count = sum(1 for t in enriched_transactions if t["API_Match"])
-        success_rate = (enriched_count / len(enriched_transactions)) * 100
-        print(f"✓ Enriched {enriched_count}/{len(enriched_transactions)} transactions ({success_rate:.1f}%)\n")
+        segments = build_segments(args)
+        if segments:
+            print(f"Evaluating {len(segments)} segments in one pass...")
+            with track_stage(metrics, "segments", rows=len(enriched_transactions)):
+                results = aggregate_segments(enriched_transactions, segments)
 
-        # ----------------------------------------------------
-        # [8/10] SAVE ENRICHED DATA
-        # ----------------------------------------------------
-        print("[8/10] Saving enriched data...")
-        save_enriched_data(enriched_transactions)
-        print("✓ Saved to: data/enriched_sales_data.txt\n")
+                for name, result in results.items():
+                    outputs.append(write_sales_report(
+                        result['aggregates'],
+                        result['enrichment'],
+                        f"{args.segment_dir}/{segment_file_name(name)}_report.txt",
+                        title=f"SEGMENT REPORT: {name}"
+                    ))
+                summary_file = save_segment_summary(results, f"{args.segment_dir}/segments.json")
+                outputs.append(summary_file)
+            print(f"✓ Segment reports saved to: {args.segment_dir}/ ({summary_file})\n")
 
-        # ----------------------------------------------------
-        # [9/10] GENERATE REPORT
-        # ----------------------------------------------------
-        print("[9/10] Generating report...")
-        generate_sales_report(transactions, enriched_transactions)
-        print("✓ Report saved to: output/sales_report.txt\n")
+        # Only the output files are cached for the next identical batch run
+        if use_cache and args.batch:
+            if run_key is None:
+                run_key = result_cache_key(
+                    "run", input_digest, filters, api_products, segments
+                )
+            written.add(save_cached_result(
+                run_key, {'artifacts': read_artifacts(outputs)},
+                args.cache_dir, cache_max_bytes, keep=written
+            ))
 
-        # ----------------------------------------------------
-        # [10/10] COMPLETE
-        # ----------------------------------------------------
-        print("[10/10] Process Complete!")
-        print("========================================")
+        if args.db:
+            print(f"Loading valid transactions into {args.db}...")
+            # The store keeps the whole input (SQL queries take their own
+            # region / date filters), so filtered runs load every valid row
+            # rather than replacing the input's history with a subset
+            db_rows = transactions
+            if filters:
+                db_rows = [t for t in parsed['transactions'] if is_valid_transaction(t)]
+            with track_stage(metrics, "db_load", rows=len(db_rows)):
+                conn = open_sales_db(args.db)
+                try:
+                    # One source per input, so reruns replace instead of duplicating
+                    loaded = load_transactions(
+                        conn, db_rows, source=os.path.abspath(args.input)
+                    )
+                    load_product_catalog(conn, create_product_mapping(api_products))
+                finally:
+                    conn.close()
+            print(f"✓ Stored {loaded} transactions in {args.db}\n")
+
+        complete_run(args, metrics)
 
     except Exception as e:
         print("An unexpected error occurred:")
         print(str(e))
         print("Please check your input files and try again.\n")
+
+    finally:
+        # A fetch still running after an error ends at its request timeouts
+        fetcher.shutdown(wait=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,75 +1,286 @@
-import requests
+import json
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+PRODUCTS_URL = "https://dummyjson.com/products"
+
+# Pagination / transport settings for the catalog fetch
+PAGE_SIZE = 100
+MAX_CONCURRENT_PAGES = 8
+REQUEST_TIMEOUT = 5  # seconds
+MAX_RETRIES = 3
+RETRY_BACKOFF = 0.5  # seconds, doubled on each retry
+
+# Only these fields are requested from the API (id is always returned)
+PRODUCT_FIELDS = ["title", "category", "brand", "price", "rating"]
 
-def fetch_all_products():
+# Local snapshot of the product catalog, reused between runs
+CATALOG_CACHE_FILE = "data/product_catalog_cache.json"
+CATALOG_CACHE_TTL = 24 * 60 * 60  # seconds
+
+
+def load_catalog_cache(cache_file=CATALOG_CACHE_FILE):
     """
-    Fetches all products from DummyJSON API.
+    Loads the cached catalog snapshot.
+
+    Returns: dict with products, fetched_at, etag and last_modified,
+    or None if there is no usable cache
+    """
+
+    try:
+        with open(cache_file, "r", encoding="utf-8") as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    if not isinstance(cache.get("products"), list):
+        return None
+
+    return cache
+
+
+def save_catalog_cache(products, etag=None, last_modified=None,
+                       cache_file=CATALOG_CACHE_FILE, pages=None):
+    """
+    Writes a catalog snapshot atomically, so a crash never leaves a
+    half-written cache behind.
+
+    pages is the number of listing pages the snapshot came from; its
+    validators are only reused when it was a single page.
+    """
+
+    directory = os.path.dirname(cache_file)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    cache = {
+        "fetched_at": time.time(),
+        "etag": etag,
+        "last_modified": last_modified,
+        "pages": pages,
+        "products": products
+    }
+
+    tmp_file = cache_file + ".tmp"
+    with open(tmp_file, "w", encoding="utf-8") as f:
+        json.dump(cache, f)
+    os.replace(tmp_file, cache_file)
+
+    return cache
+
+
+def _clean_products(products):
+    """
+    Keeps only the product fields the pipeline uses.
     """
+    return [
+        {
+            "id": p.get("id"),
+            "title": p.get("title"),
+            "category": p.get("category"),
+            "brand": p.get("brand"),
+            "price": p.get("price"),
+            "rating": p.get("rating")
+        }
+        for p in products
+    ]
+
+
+def create_session(pool_size=MAX_CONCURRENT_PAGES, retries=MAX_RETRIES,
+                   backoff=RETRY_BACKOFF):
+    """
+    Creates a keep-alive HTTP session with a connection pool and retries.
+
+    Connection errors and 429/5xx responses are retried with exponential
+    backoff.
+    """
+
+    retry = Retry(
+        total=retries,
+        backoff_factor=backoff,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=("GET",)
+    )
+    adapter = HTTPAdapter(
+        pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry
+    )
+
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
 
-    url = "https://dummyjson.com/products?limit=100"
+
+def _get_page(session, url, skip, limit, fields, headers=None, timeout=REQUEST_TIMEOUT):
+    """
+    Requests one page of the product listing.
+    """
+
+    params = {"limit": limit, "skip": skip}
+    if fields:
+        params["select"] = ",".join(fields)
+
+    return session.get(url, params=params, headers=headers, timeout=timeout)
+
+
+def fetch_product_pages(url=PRODUCTS_URL, page_size=PAGE_SIZE,
+                        max_workers=MAX_CONCURRENT_PAGES, fields=PRODUCT_FIELDS,
+                        headers=None, session=None, timeout=REQUEST_TIMEOUT):
+    """
+    Fetches every page of the product listing.
+
+    The first page tells us the total and the page size the server
+    actually applies (it may cap limit); the remaining pages are fetched
+    concurrently over one pooled session, at most max_workers at a time.
+    headers (conditional request validators) only go on the first page, so
+    a 304 only covers the whole listing when it is a single page.
+
+    Returns: (response of the first page, list of raw products in listing
+    order, number of pages); the product list is None when the first page
+    is not a 200
+    """
+
+    own_session = session is None
+    if own_session:
+        session = create_session(pool_size=max_workers)
 
     try:
-        response = requests.get(url, timeout=5)
-        response.raise_for_status()  
-        data = response.json()
-
-        products = data.get("products", [])
-
-        cleaned = [
-            {
-                "id": p.get("id"),
-                "title": p.get("title"),
-                "category": p.get("category"),
-                "brand": p.get("brand"),
-                "price": p.get("price"),
-                "rating": p.get("rating")
-            }
-            for p in products
-        ]
-
-        print(f"Successfully fetched {len(cleaned)} products")
-        return cleaned
+        first = _get_page(session, url, 0, page_size, fields, headers, timeout)
+        if first.status_code == 304:
+            return first, None, 1
+        first.raise_for_status()   # catches HTTP errors
 
-    except Exception as e:
-        print(f"Failed to fetch products: {e}")
-        return []
+        data = first.json()
+        products = list(data.get("products", []))
+        total = data.get("total", len(products))
 
-import requests
+        def get_page(skip):
+            response = _get_page(session, url, skip, page_size, fields, timeout=timeout)
+            response.raise_for_status()
+            return response.json().get("products", [])
+
+        # Step by the page size the server applied, not the one requested
+        step = min(data.get("limit") or page_size, len(products))
+        skips = range(len(products), total, step) if products else []
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            # map() keeps pages in listing order
+            for page in pool.map(get_page, skips):
+                products.extend(page)
+
+        return first, products, 1 + len(skips)
 
-def fetch_all_products():
+    finally:
+        if own_session:
+            session.close()
+
+
+def fetch_all_products(use_cache=True, ttl=CATALOG_CACHE_TTL, force_refresh=False,
+                       cache_file=CATALOG_CACHE_FILE, url=PRODUCTS_URL, log=print):
     """
     Fetches all products from DummyJSON API.
+
+    Every page of the listing is fetched (see fetch_product_pages). A
+    cached snapshot younger than ttl seconds is returned without a network
+    call. Older snapshots are revalidated with If-None-Match /
+    If-Modified-Since when the listing was a single page (a 304 on the
+    first page says nothing about later ones), else refetched in full.
+    When the API is unreachable the last good snapshot is used instead of
+    an empty catalog.
+
+    Status messages go to log (print by default); a background fetch can
+    pass e.g. a list's append and show them when it is joined.
     """
 
-    url = "https://dummyjson.com/products?limit=100"
+    cache = load_catalog_cache(cache_file) if use_cache else None
+
+    if cache and not force_refresh:
+        age = time.time() - cache.get("fetched_at", 0)
+        if age < ttl:
+            log(f"Loaded {len(cache['products'])} products from cache")
+            return cache["products"]
+
+    headers = {}
+    if cache and cache.get("pages") == 1:
+        if cache.get("etag"):
+            headers["If-None-Match"] = cache["etag"]
+        if cache.get("last_modified"):
+            headers["If-Modified-Since"] = cache["last_modified"]
 
     try:
-        response = requests.get(url, timeout=5)
-        response.raise_for_status()   # catches HTTP errors
-        data = response.json()
-
-        products = data.get("products", [])
-
-        cleaned = [
-            {
-                "id": p.get("id"),
-                "title": p.get("title"),
-                "category": p.get("category"),
-                "brand": p.get("brand"),
-                "price": p.get("price"),
-                "rating": p.get("rating")
-            }
-            for p in products
-        ]
-
-        print(f"Successfully fetched {len(cleaned)} products")
+        response, products, pages = fetch_product_pages(url=url, headers=headers)
+
+        # Catalog unchanged since the snapshot: just renew its age
+        if products is None and cache:
+            save_catalog_cache(
+                cache["products"], cache.get("etag"), cache.get("last_modified"),
+                cache_file=cache_file, pages=1
+            )
+            log(f"Catalog unchanged, using {len(cache['products'])} cached products")
+            return cache["products"]
+
+        cleaned = _clean_products(products or [])
+
+        if use_cache:
+            save_catalog_cache(
+                cleaned,
+                response.headers.get("ETag"),
+                response.headers.get("Last-Modified"),
+                cache_file=cache_file,
+                pages=pages
+            )
+
+        log(f"Successfully fetched {len(cleaned)} products")
         return cleaned
 
     except Exception as e:
-        print(f"Failed to fetch products: {e}")
+        log(f"Failed to fetch products: {e}")
+
+        if cache:
+            log(f"Using last cached catalog ({len(cache['products'])} products)")
+            return cache["products"]
+
         return []
 
 
+def warm_product_cache(cache_file=CATALOG_CACHE_FILE, url=PRODUCTS_URL):
+    """
+    Refreshes the catalog cache from the API regardless of its age.
+    """
+    return fetch_all_products(force_refresh=True, cache_file=cache_file, url=url)
+
+
+def inspect_product_cache(cache_file=CATALOG_CACHE_FILE, ttl=CATALOG_CACHE_TTL):
+    """
+    Describes the cached catalog snapshot.
+
+    Returns: dict with path, product_count, fetched_at, age_seconds, fresh
+    and etag, or None if there is no cache
+    """
+
+    cache = load_catalog_cache(cache_file)
+    if cache is None:
+        return None
+
+    age = time.time() - cache.get("fetched_at", 0)
+
+    return {
+        "path": cache_file,
+        "product_count": len(cache["products"]),
+        "fetched_at": time.strftime(
+            "%Y-%m-%d %H:%M:%S", time.localtime(cache.get("fetched_at", 0))
+        ),
+        "age_seconds": round(age, 1),
+        "fresh": age < ttl,
+        "etag": cache.get("etag")
+    }
+
+
 def create_product_mapping(api_products):
     """
     Creates a mapping of product IDs to product info.
@@ -92,108 +303,120 @@ def create_product_mapping(api_products):
     return mapping
 
 
-def enrich_sales_data(transactions, product_mapping):
+UNMATCHED_PRODUCT = {
+    "API_Category": None,
+    "API_Brand": None,
+    "API_Rating": None,
+    "API_Match": False
+}
+
+
+def new_product_dimension(product_mapping):
     """
-    Enriches transaction data with API product information.
+    Creates the product dimension table used by enrichment.
+
+    Each distinct ProductID is resolved against product_mapping once and
+    its API fields are kept here, along with the number of rows that
+    referenced it, so match statistics never need a rescan of the rows.
     """
+    return {'mapping': product_mapping, 'products': {}, 'rows': {}}
 
-    enriched = []
 
-    # Ensure output directory exists
-    os.makedirs("data", exist_ok=True)
-    output_file = "data/enriched_sales_data.txt"
+def resolve_product(dimension, product_id):
+    """
+    Looks up the API fields of one ProductID, resolving it on first use.
 
-    # Prepare header for output file
-    header = (
-        "TransactionID|Date|ProductID|ProductName|Quantity|UnitPrice|"
-        "CustomerID|Region|API_Category|API_Brand|API_Rating|API_Match\n"
-    )
+    Returns: dict of API_Category, API_Brand, API_Rating and API_Match
+    (shared between rows; do not modify)
+    """
 
-    with open(output_file, "w", encoding="utf-8") as f:
-        f.write(header)
-
-        for t in transactions:
-            try:
-                # Extract numeric ID from ProductID (e.g., P101 → 101)
-                raw_id = t.get("ProductID", "")
-                numeric_id = int(raw_id[1:]) if raw_id[1:].isdigit() else None
-
-                api_info = product_mapping.get(numeric_id)
-
-                if api_info:
-                    t["API_Category"] = api_info.get("category")
-                    t["API_Brand"] = api_info.get("brand")
-                    t["API_Rating"] = api_info.get("rating")
-                    t["API_Match"] = True
-                else:
-                    t["API_Category"] = None
-                    t["API_Brand"] = None
-                    t["API_Rating"] = None
-                    t["API_Match"] = False
-
-                enriched.append(t)
-
-                # Write to file (pipe-delimited)
-                row = (
-                    f"{t['TransactionID']}|{t['Date']}|{t['ProductID']}|"
-                    f"{t['ProductName']}|{t['Quantity']}|{t['UnitPrice']}|"
-                    f"{t['CustomerID']}|{t['Region']}|"
-                    f"{t['API_Category']}|{t['API_Brand']}|{t['API_Rating']}|"
-                    f"{t['API_Match']}\n"
-                )
-                f.write(row)
-
-            except Exception:
-                # Graceful fallback if anything unexpected happens
-                t["API_Category"] = None
-                t["API_Brand"] = None
-                t["API_Rating"] = None
-                t["API_Match"] = False
-                enriched.append(t)
-
-    print(f"Enriched data saved to {output_file}")
-    return enriched
+    attrs = dimension['products'].get(product_id)
+    if attrs is not None:
+        return attrs
 
+    try:
+        # Extract numeric ID from ProductID (e.g., P101 → 101)
+        raw_id = product_id[1:]
+        api_info = dimension['mapping'].get(int(raw_id) if raw_id.isdigit() else None)
+    except Exception:
+        # Graceful fallback if anything unexpected happens
+        api_info = None
+
+    if api_info:
+        attrs = {
+            "API_Category": api_info.get("category"),
+            "API_Brand": api_info.get("brand"),
+            "API_Rating": api_info.get("rating"),
+            "API_Match": True
+        }
+    else:
+        attrs = UNMATCHED_PRODUCT
+
+    dimension['products'][product_id] = attrs
+    return attrs
 
-import os
 
-def save_enriched_data(enriched_transactions, filename='data/enriched_sales_data.txt'):
+def product_dimension_summary(dimension):
     """
-    Saves enriched transactions back to file in pipe-delimited format.
+    Match statistics of everything enriched through a dimension table.
+
+    Returns: {'enriched', 'total', 'unmatched': set of ProductIDs}, the
+    shape of utils.segments.new_enrichment_summary
     """
 
-    # Ensure output directory exists
-    os.makedirs(os.path.dirname(filename), exist_ok=True)
+    summary = {'enriched': 0, 'total': 0, 'unmatched': set()}
+    for product_id, count in dimension['rows'].items():
+        summary['total'] += count
+        if dimension['products'][product_id]['API_Match']:
+            summary['enriched'] += count
+        else:
+            summary['unmatched'].add(product_id)
+    return summary
 
-    # Define header
-    header = (
-        "TransactionID|Date|ProductID|ProductName|Quantity|UnitPrice|"
-        "CustomerID|Region|API_Category|API_Brand|API_Rating|API_Match\n"
-    )
 
-    with open(filename, "w", encoding="utf-8") as f:
-        f.write(header)
-
-        for t in enriched_transactions:
-            # Convert None → empty string for safe writing
-            def safe(v):
-                return "" if v is None else v
-
-            row = (
-                f"{safe(t.get('TransactionID'))}|"
-                f"{safe(t.get('Date'))}|"
-                f"{safe(t.get('ProductID'))}|"
-                f"{safe(t.get('ProductName'))}|"
-                f"{safe(t.get('Quantity'))}|"
-                f"{safe(t.get('UnitPrice'))}|"
-                f"{safe(t.get('CustomerID'))}|"
-                f"{safe(t.get('Region'))}|"
-                f"{safe(t.get('API_Category'))}|"
-                f"{safe(t.get('API_Brand'))}|"
-                f"{safe(t.get('API_Rating'))}|"
-                f"{safe(t.get('API_Match'))}\n"
-            )
+def iter_enriched_sales(transactions, product_mapping, dimension=None):
+    """
+    Streams enriched copies of transactions.
+
+    Pass a dimension (new_product_dimension) to reuse resolved products
+    across calls and read match statistics from it afterwards.
+    """
+
+    if dimension is None:
+        dimension = new_product_dimension(product_mapping)
+    products = dimension['products']
+    rows = dimension['rows']
+
+    for t in transactions:
+        product_id = t.get("ProductID")
+        attrs = products.get(product_id)
+        if attrs is None:
+            attrs = resolve_product(dimension, product_id)
+        rows[product_id] = rows.get(product_id, 0) + 1
+
+        enriched = t.copy()
+        enriched.update(attrs)
+        yield enriched
+
+
+def enrich_sales_data(transactions, product_mapping, dimension=None):
+    """
+    Enriches transaction data with API product information.
+
+    Every distinct ProductID is resolved once into the product dimension
+    table; rows then only get its fields attached.
+
+    Pure transform: the input rows are left untouched and nothing is
+    written to disk; use save_enriched_data for the output file.
+    """
+    return list(iter_enriched_sales(transactions, product_mapping, dimension))
+
 
-            f.write(row)
+if __name__ == "__main__":
+    import sys
 
-    print(f"Enriched data saved to {filename}")
+    # python -m utils.api_handler [warm|inspect]
+    if len(sys.argv) > 1 and sys.argv[1] == "warm":
+        warm_product_cache()
+    else:
+        print(inspect_product_cache() or "No product catalog cache found")
@@ -0,0 +1,348 @@
+import base64
+import copy
+import hashlib
+import json
+import mmap
+import os
+from array import array
+
+from utils.data_processor import (
+    merge_sales_aggregates,
+    new_sales_aggregates,
+    update_sales_aggregates
+)
+from utils.file_handler import (
+    add_filter_summary,
+    detect_encoding,
+    header_end,
+    iter_range_lines,
+    iter_transactions,
+    iter_validate_and_filter,
+    new_filter_summary,
+    resolve_sales_inputs
+)
+from utils.sketches import RANK_BITS, hll_sparse_items
+
+
+CHECKPOINT_FILE = "data/sales_checkpoint.json"
+CHECKPOINT_VERSION = 4
+
+# Bytes hashed at the start of the file and just before the high-water mark
+# to detect that the already-processed part was rewritten
+FINGERPRINT_BYTES = 64 * 1024
+
+# Aggregate fields holding exact sets (sorted lists on disk) or HyperLogLog
+# sketches (base64 registers on disk)
+SET_FIELDS = ('products_bought', 'unique_customers')
+
+
+def _fingerprint(mm, start, end):
+    """
+    Hashes the byte range [start, end) of a mapped file.
+    """
+    return hashlib.sha256(mm[start:end]).hexdigest()
+
+
+def _distinct_to_json(value):
+    """
+    Converts a set or HyperLogLog sketch into JSON-safe data.
+    """
+    if isinstance(value, set):
+        return sorted(value)
+
+    sketch = dict(value)
+    if sketch['registers'] is not None:
+        sketch['registers'] = base64.b64encode(sketch['registers']).decode('ascii')
+    else:
+        sketch['sparse'] = [[idx, rank] for idx, rank in hll_sparse_items(sketch['sparse'])]
+    return sketch
+
+
+def _distinct_from_json(value):
+    """
+    Rebuilds a set or sketch saved by _distinct_to_json.
+    """
+    if isinstance(value, list):
+        return set(value)
+
+    if value['registers'] is not None:
+        value['registers'] = bytearray(base64.b64decode(value['registers']))
+    else:
+        value['sparse'] = array('I', (idx << RANK_BITS | rank for idx, rank in value['sparse']))
+    return value
+
+
+def _aggregates_to_json(aggregates):
+    """
+    Converts an aggregate state into JSON-safe data.
+    """
+    data = dict(aggregates)
+    for group in ('regions', 'products', 'customers', 'daily'):
+        data[group] = {
+            key: {
+                field: _distinct_to_json(value) if field in SET_FIELDS else value
+                for field, value in stats.items()
+            }
+            for key, stats in aggregates[group].items()
+        }
+    return data
+
+
+def _aggregates_from_json(data):
+    """
+    Rebuilds an aggregate state saved by _aggregates_to_json.
+    """
+    for group in ('regions', 'products', 'customers', 'daily'):
+        for stats in data[group].values():
+            for field in SET_FIELDS:
+                if field in stats:
+                    stats[field] = _distinct_from_json(stats[field])
+    return data
+
+
+def load_checkpoint(checkpoint_file=CHECKPOINT_FILE):
+    """
+    Loads a saved checkpoint.
+
+    Returns: checkpoint dict, or None if missing or unreadable
+    """
+
+    try:
+        with open(checkpoint_file, "r", encoding="utf-8") as f:
+            checkpoint = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    if checkpoint.get("version") != CHECKPOINT_VERSION:
+        return None
+
+    checkpoint["aggregates"] = _aggregates_from_json(checkpoint["aggregates"])
+    return checkpoint
+
+
+def save_checkpoint(checkpoint, checkpoint_file=CHECKPOINT_FILE):
+    """
+    Writes a checkpoint atomically.
+    """
+
+    directory = os.path.dirname(checkpoint_file)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    data = dict(checkpoint)
+    data["version"] = CHECKPOINT_VERSION
+    data["aggregates"] = _aggregates_to_json(checkpoint["aggregates"])
+
+    tmp_file = checkpoint_file + ".tmp"
+    with open(tmp_file, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    os.replace(tmp_file, checkpoint_file)
+
+
+def _can_resume(checkpoint, mm, source, filters, distinct, precision):
+    """
+    Checks that a checkpoint belongs to this file, filters and distinct
+    mode, and that the bytes it covers have only been appended to since.
+    """
+
+    if checkpoint is None:
+        return False
+    if checkpoint["source"] != os.path.abspath(source) or checkpoint["filters"] != filters:
+        return False
+    aggregates = checkpoint["aggregates"]
+    if (aggregates["distinct"], aggregates["precision"]) != (distinct, precision):
+        return False
+
+    offset = checkpoint["offset"]
+    if offset > len(mm):
+        return False
+
+    head = min(FINGERPRINT_BYTES, offset)
+    return (
+        _fingerprint(mm, 0, head) == checkpoint["head_digest"]
+        and _fingerprint(mm, max(offset - FINGERPRINT_BYTES, 0), offset) == checkpoint["tail_digest"]
+    )
+
+
+def _fold_range(aggregates, summary, product_rows, mm, start, end, encoding, filters):
+    """
+    Parses, validates, filters and aggregates the byte range [start, end),
+    counting the kept rows per ProductID into product_rows.
+    """
+
+    def counted(rows):
+        for t in rows:
+            pid = t['ProductID']
+            product_rows[pid] = product_rows.get(pid, 0) + 1
+            yield t
+
+    rows = iter_validate_and_filter(
+        iter_transactions(iter_range_lines(mm, start, end, encoding), summary=summary),
+        summary=summary,
+        **filters
+    )
+    update_sales_aggregates(aggregates, counted(rows))
+
+
+def _add_product_rows(product_rows, other):
+    """
+    Adds per-ProductID row counts into product_rows.
+    """
+    for pid, count in other.items():
+        product_rows[pid] = product_rows.get(pid, 0) + count
+
+
+def partition_checkpoint_file(checkpoint_file, filename):
+    """
+    Names the checkpoint of one partition file, next to checkpoint_file
+    (data/sales_checkpoint.json → data/sales_checkpoint.<hash>.json).
+    """
+    root, ext = os.path.splitext(checkpoint_file)
+    digest = hashlib.sha256(os.path.abspath(filename).encode('utf-8')).hexdigest()[:12]
+    return f"{root}.{digest}{ext}"
+
+
+def stream_sales_file_incremental(filename, region=None, min_amount=None, max_amount=None,
+                                  checkpoint_file=CHECKPOINT_FILE, distinct='exact',
+                                  precision=12):
+    """
+    Incremental counterpart of stream_sales_file.
+
+    The aggregate state, filter summary and a high-water mark (byte offset
+    of the last complete line processed) are kept in checkpoint_file. When
+    the input has only grown since, just the appended rows are parsed and
+    folded in; otherwise, or when the appended bytes would change the
+    file's detected encoding, everything is recomputed. Either way the
+    results match a full recompute.
+
+    filename may also be a directory or glob of partitions (see
+    resolve_sales_inputs). Each partition then keeps its own checkpoint
+    (partition_checkpoint_file) and the states are merged in partition
+    order, so only new or grown partitions are read.
+
+    Returns: (aggregates, summary, info); info['mode'] is 'incremental'
+    (every file resumed) or 'full', info['product_rows'] counts the kept
+    rows per ProductID, and info['files'] has the info of each partition
+    """
+
+    filters = {'region': region, 'min_amount': min_amount, 'max_amount': max_amount}
+
+    filenames = resolve_sales_inputs(filename)
+    if filenames == [filename]:
+        aggregates, summary, info = _stream_one_incremental(
+            filename, filters, checkpoint_file, distinct, precision
+        )
+        info['files'] = {filename: dict(info)}
+        return aggregates, summary, info
+
+    if not filenames:
+        print(f"Error: No sales files match '{filename}'.")
+
+    aggregates = new_sales_aggregates(distinct, precision)
+    summary = new_filter_summary()
+    info = {'mode': 'incremental', 'bytes_processed': 0, 'product_rows': {}, 'files': {}}
+
+    for path in filenames:
+        part_aggregates, part_summary, part_info = _stream_one_incremental(
+            path, filters, partition_checkpoint_file(checkpoint_file, path), distinct, precision
+        )
+        merge_sales_aggregates(aggregates, part_aggregates)
+        add_filter_summary(summary, part_summary)
+        _add_product_rows(info['product_rows'], part_info['product_rows'])
+        info['bytes_processed'] += part_info['bytes_processed']
+        if part_info['mode'] != 'incremental':
+            info['mode'] = 'full'
+        info['files'][path] = part_info
+
+    if not filenames:
+        info['mode'] = 'full'
+
+    return aggregates, summary, info
+
+
+def _stream_one_incremental(filename, filters, checkpoint_file, distinct, precision):
+    """
+    Runs stream_sales_file_incremental for one file and its checkpoint.
+    """
+
+    def empty():
+        return (
+            new_sales_aggregates(distinct, precision), new_filter_summary(),
+            {'mode': 'full', 'bytes_processed': 0, 'product_rows': {}}
+        )
+
+    try:
+        f = open(filename, 'rb')
+    except FileNotFoundError:
+        print(f"Error: File '{filename}' not found.")
+        return empty()
+
+    with f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return empty()
+
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            size = len(mm)
+            checkpoint = load_checkpoint(checkpoint_file)
+            resume = _can_resume(checkpoint, mm, filename, filters, distinct, precision)
+
+            if resume:
+                start = checkpoint["offset"]
+                encoding = checkpoint["encoding"]
+                # New bytes must decode the same way the whole file would
+                if start < size and detect_encoding(mm[start:], [encoding]) is None:
+                    resume = False
+
+            if resume:
+                aggregates = checkpoint["aggregates"]
+                summary = checkpoint["summary"]
+                product_rows = checkpoint["product_rows"]
+            else:
+                encoding = detect_encoding(mm)
+                if encoding is None:
+                    print("Error: Unable to decode file with supported encodings.")
+                    return empty()
+                start = header_end(mm)
+                aggregates = new_sales_aggregates(distinct, precision)
+                summary = new_filter_summary()
+                product_rows = {}
+
+            # Only complete lines move the high-water mark
+            last_newline = mm.rfind(b'\n', start)
+            committed = start if last_newline == -1 else last_newline + 1
+
+            _fold_range(aggregates, summary, product_rows, mm, start, committed, encoding, filters)
+
+            save_checkpoint({
+                "source": os.path.abspath(filename),
+                "filters": filters,
+                "encoding": encoding,
+                "offset": committed,
+                "head_digest": _fingerprint(mm, 0, min(FINGERPRINT_BYTES, committed)),
+                "tail_digest": _fingerprint(mm, max(committed - FINGERPRINT_BYTES, 0), committed),
+                "summary": summary,
+                "product_rows": product_rows,
+                "aggregates": aggregates
+            }, checkpoint_file)
+
+            # A trailing line without a newline counts for this run only
+            if committed < size:
+                aggregates = copy.deepcopy(aggregates)
+                summary = copy.deepcopy(summary)
+                product_rows = dict(product_rows)
+                tail_aggregates = new_sales_aggregates(distinct, precision)
+                tail_summary = new_filter_summary()
+                tail_rows = {}
+                _fold_range(tail_aggregates, tail_summary, tail_rows, mm, committed, size,
+                            encoding, filters)
+                merge_sales_aggregates(aggregates, tail_aggregates)
+                add_filter_summary(summary, tail_summary)
+                _add_product_rows(product_rows, tail_rows)
+
+            info = {
+                'mode': 'incremental' if resume else 'full',
+                'bytes_processed': size - start,
+                'product_rows': product_rows
+            }
+
+    return aggregates, summary, info
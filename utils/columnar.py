@@ -0,0 +1,488 @@
+import heapq
+import json
+import os
+import struct
+from array import array
+
+import numpy as np
+
+from utils.api_handler import new_product_dimension, resolve_product
+from utils.file_handler import parse_line
+
+
+# Low-cardinality text columns stored as integer codes + a value dictionary
+ENCODED_COLUMNS = ['Region', 'ProductID', 'ProductName', 'CustomerID', 'Date']
+
+# Binary columnar file layout for enriched data:
+#   magic | uint64 header length | JSON header | 64-byte aligned column blocks
+COLUMNAR_MAGIC = b"SALESCOL"
+COLUMNAR_VERSION = 1
+COLUMN_ALIGNMENT = 64
+
+ENRICHED_ENCODED_COLUMNS = ENCODED_COLUMNS + ['API_Category', 'API_Brand']
+
+
+def _new_encoded_column():
+    """
+    Creates an empty dictionary-encoded column.
+    """
+    return {'codes': array('i'), 'lookup': {}, 'values': []}
+
+
+def _encode(column, value):
+    """
+    Appends the code for value to a dictionary-encoded column.
+    """
+    code = column['lookup'].get(value)
+    if code is None:
+        code = column['lookup'][value] = len(column['values'])
+        column['values'].append(value)
+    column['codes'].append(code)
+
+
+def _finish_table(transaction_ids, quantities, prices, encoded):
+    """
+    Converts the column builders into the final NumPy-backed table.
+    """
+
+    quantity = np.frombuffer(quantities, dtype=np.int64) if quantities else np.zeros(0, dtype=np.int64)
+    unit_price = np.frombuffer(prices, dtype=np.float64) if prices else np.zeros(0, dtype=np.float64)
+
+    table = {
+        'size': len(quantity),
+        'TransactionID': np.array(transaction_ids, dtype=str),
+        'Quantity': quantity,
+        'UnitPrice': unit_price,
+        'Amount': quantity * unit_price
+    }
+
+    for name, column in encoded.items():
+        codes = column['codes']
+        table[name] = {
+            'codes': np.frombuffer(codes, dtype=np.int32) if codes else np.zeros(0, dtype=np.int32),
+            'values': column['values']
+        }
+
+    return table
+
+
+def build_transaction_table(raw_lines):
+    """
+    Parses raw lines straight into a columnar transaction table.
+
+    Same cleaning rules as parse_transactions, but no per-row dict is built.
+
+    Returns: dict of NumPy columns; encoded columns are {'codes', 'values'}
+    """
+
+    transaction_ids = []
+    quantities = array('q')
+    prices = array('d')
+    encoded = {name: _new_encoded_column() for name in ENCODED_COLUMNS}
+
+    region_col = encoded['Region']
+    product_id_col = encoded['ProductID']
+    product_name_col = encoded['ProductName']
+    customer_col = encoded['CustomerID']
+    date_col = encoded['Date']
+
+    for line in raw_lines:
+        fields = parse_line(line)
+        if fields is None:
+            continue
+
+        (
+            transaction_id,
+            date,
+            product_id,
+            product_name,
+            quantity,
+            unit_price,
+            customer_id,
+            region
+        ) = fields
+
+        transaction_ids.append(transaction_id)
+        quantities.append(quantity)
+        prices.append(unit_price)
+        _encode(date_col, date)
+        _encode(product_id_col, product_id)
+        _encode(product_name_col, product_name)
+        _encode(customer_col, customer_id)
+        _encode(region_col, region)
+
+    return _finish_table(transaction_ids, quantities, prices, encoded)
+
+
+def transactions_to_table(transactions):
+    """
+    Converts a list of transaction dicts into a columnar transaction table.
+    """
+
+    transaction_ids = []
+    quantities = array('q')
+    prices = array('d')
+    encoded = {name: _new_encoded_column() for name in ENCODED_COLUMNS}
+
+    for t in transactions:
+        transaction_ids.append(t['TransactionID'])
+        quantities.append(t['Quantity'])
+        prices.append(t['UnitPrice'])
+        for name, column in encoded.items():
+            _encode(column, t[name])
+
+    return _finish_table(transaction_ids, quantities, prices, encoded)
+
+
+def column_values(table, name):
+    """
+    Decodes a dictionary-encoded column back to a list of strings.
+    """
+    values = table[name]['values']
+    return [values[code] for code in table[name]['codes']]
+
+
+def _group_totals(table, name, weights):
+    """
+    Sums weights per code of an encoded column.
+    """
+    return np.bincount(
+        table[name]['codes'], weights=weights, minlength=len(table[name]['values'])
+    )
+
+
+def _group_counts(table, name):
+    """
+    Counts rows per code of an encoded column.
+    """
+    return np.bincount(table[name]['codes'], minlength=len(table[name]['values']))
+
+
+def table_total_revenue(table):
+    """
+    Calculates total revenue from a transaction table.
+    """
+    return float(table['Amount'].sum())
+
+
+def table_region_wise_sales(table):
+    """
+    Vectorized region_wise_sales over a transaction table.
+    """
+
+    totals = _group_totals(table, 'Region', table['Amount'])
+    counts = _group_counts(table, 'Region')
+    overall_total = totals.sum()
+
+    region_stats = {}
+    for code, region in enumerate(table['Region']['values']):
+        total = float(totals[code])
+        region_stats[region] = {
+            'total_sales': total,
+            'transaction_count': int(counts[code]),
+            'percentage': round((total / overall_total) * 100, 2) if overall_total > 0 else 0.0
+        }
+
+    # --- Sort by total_sales descending ---
+    return dict(
+        sorted(region_stats.items(), key=lambda x: x[1]['total_sales'], reverse=True)
+    )
+
+
+def table_product_stats(table):
+    """
+    Vectorized per-product totals over a transaction table.
+
+    Returns: list of (ProductName, total_qty, total_revenue) in first-seen order
+    """
+
+    qty = _group_totals(table, 'ProductName', table['Quantity'])
+    revenue = _group_totals(table, 'ProductName', table['Amount'])
+
+    return [
+        (name, int(qty[code]), float(revenue[code]))
+        for code, name in enumerate(table['ProductName']['values'])
+    ]
+
+
+def table_top_selling_products(table, n=5):
+    """
+    Vectorized top_selling_products over a transaction table.
+    """
+    return heapq.nlargest(n, table_product_stats(table), key=lambda x: x[1])
+
+
+def table_low_performing_products(table, threshold=10):
+    """
+    Vectorized low_performing_products over a transaction table.
+    """
+    low_products = [p for p in table_product_stats(table) if p[1] < threshold]
+    low_products.sort(key=lambda x: x[1])
+    return low_products
+
+
+def _distinct_pairs(table, outer, inner):
+    """
+    Finds the distinct (outer, inner) code pairs of two encoded columns.
+
+    Returns: (outer_codes, inner_codes) arrays sorted by outer then inner code
+    """
+    width = max(len(table[inner]['values']), 1)
+    keys = table[outer]['codes'].astype(np.int64) * width + table[inner]['codes']
+    keys = np.unique(keys)
+    return keys // width, keys % width
+
+
+def table_customer_analysis(table):
+    """
+    Vectorized customer_analysis over a transaction table.
+    """
+
+    spent = _group_totals(table, 'CustomerID', table['Amount'])
+    counts = _group_counts(table, 'CustomerID')
+
+    # --- Distinct products per customer ---
+    customer_codes, product_codes = _distinct_pairs(table, 'CustomerID', 'ProductName')
+    names = table['ProductName']['values']
+    bought = [[] for _ in table['CustomerID']['values']]
+    for cid, pid in zip(customer_codes.tolist(), product_codes.tolist()):
+        bought[cid].append(names[pid])
+
+    customer_stats = {}
+    for code, cid in enumerate(table['CustomerID']['values']):
+        total = float(spent[code])
+        count = int(counts[code])
+        customer_stats[cid] = {
+            'total_spent': total,
+            'purchase_count': count,
+            'products_bought': sorted(bought[code]),
+            'avg_order_value': round(total / count, 2) if count > 0 else 0.0
+        }
+
+    # --- Sort by total_spent descending ---
+    return dict(
+        sorted(customer_stats.items(), key=lambda x: x[1]['total_spent'], reverse=True)
+    )
+
+
+def table_daily_sales_trend(table):
+    """
+    Vectorized daily_sales_trend over a transaction table.
+    """
+
+    revenue = _group_totals(table, 'Date', table['Amount'])
+    counts = _group_counts(table, 'Date')
+
+    # --- Unique customers per date ---
+    date_codes, _ = _distinct_pairs(table, 'Date', 'CustomerID')
+    unique_customers = np.bincount(date_codes, minlength=len(table['Date']['values']))
+
+    daily = {
+        date: {
+            'revenue': float(revenue[code]),
+            'transaction_count': int(counts[code]),
+            'unique_customers': int(unique_customers[code])
+        }
+        for code, date in enumerate(table['Date']['values'])
+    }
+
+    # --- Sort chronologically ---
+    return dict(sorted(daily.items(), key=lambda x: x[0]))
+
+
+def table_peak_sales_day(table):
+    """
+    Vectorized find_peak_sales_day over a transaction table.
+    """
+
+    if table['size'] == 0:
+        return None  # no data
+
+    revenue = _group_totals(table, 'Date', table['Amount'])
+    counts = _group_counts(table, 'Date')
+    code = int(np.argmax(revenue))
+
+    return table['Date']['values'][code], float(revenue[code]), int(counts[code])
+
+
+def table_enrich(table, product_mapping, dimension=None):
+    """
+    Vectorized enrichment join of a transaction table with the catalog.
+
+    Each distinct ProductID of the table is resolved once into the product
+    dimension table (see utils.api_handler.new_product_dimension); the API
+    columns are then gathered by ProductID code, without a per-row loop.
+    Per-product row counts go into the dimension, so
+    product_dimension_summary gives the match statistics.
+
+    Returns: new table with API_Category / API_Brand (encoded), API_Rating
+    (NaN when missing) and API_Match columns
+    """
+
+    if dimension is None:
+        dimension = new_product_dimension(product_mapping)
+
+    product_ids = table['ProductID']['values']
+    codes = table['ProductID']['codes']
+    attrs = [resolve_product(dimension, pid) for pid in product_ids]
+
+    counts = np.bincount(codes, minlength=len(product_ids))
+    for pid, count in zip(product_ids, counts.tolist()):
+        if count:
+            dimension['rows'][pid] = dimension['rows'].get(pid, 0) + count
+
+    enriched = dict(table)
+
+    for name in ('API_Category', 'API_Brand'):
+        column = _new_encoded_column()
+        for info in attrs:
+            _encode(column, info[name])
+        # code of this column's value for each ProductID code
+        lookup = np.array(column['codes'], dtype=np.int32)
+        enriched[name] = {'codes': lookup[codes], 'values': column['values']}
+
+    ratings = np.array(
+        [np.nan if info['API_Rating'] is None else info['API_Rating'] for info in attrs],
+        dtype=np.float64
+    )
+    matches = np.array([info['API_Match'] for info in attrs], dtype=np.bool_)
+    enriched['API_Rating'] = ratings[codes]
+    enriched['API_Match'] = matches[codes]
+
+    return enriched
+
+
+def _enriched_to_columns(enriched_transactions):
+    """
+    Builds typed NumPy columns from enriched transaction rows.
+
+    API_Rating uses NaN for missing ratings; text columns are dictionary
+    encoded.
+    """
+
+    transaction_ids = []
+    quantities = array('q')
+    prices = array('d')
+    ratings = array('d')
+    matches = bytearray()
+    encoded = {name: _new_encoded_column() for name in ENRICHED_ENCODED_COLUMNS}
+
+    for t in enriched_transactions:
+        transaction_ids.append(t['TransactionID'])
+        quantities.append(t['Quantity'])
+        prices.append(t['UnitPrice'])
+        rating = t.get('API_Rating')
+        ratings.append(float('nan') if rating is None else rating)
+        matches.append(1 if t.get('API_Match') else 0)
+        for name, column in encoded.items():
+            _encode(column, t.get(name))
+
+    quantity = np.array(quantities, dtype='<i8')
+    unit_price = np.array(prices, dtype='<f8')
+
+    columns = {
+        'TransactionID': np.array(transaction_ids, dtype=str) if transaction_ids else np.zeros(0, dtype='<U1'),
+        'Quantity': quantity,
+        'UnitPrice': unit_price,
+        'Amount': quantity * unit_price,
+        'API_Rating': np.array(ratings, dtype='<f8'),
+        'API_Match': np.frombuffer(bytes(matches), dtype=np.bool_)
+    }
+    for name, column in encoded.items():
+        columns[name] = {
+            'codes': np.array(column['codes'], dtype='<i4'),
+            'values': column['values']
+        }
+
+    return columns
+
+
+def save_enriched_columnar(enriched_transactions, filename='data/enriched_sales_data.col'):
+    """
+    Saves enriched transactions in the binary columnar format.
+
+    Returns: number of rows written
+    """
+
+    columns = _enriched_to_columns(enriched_transactions)
+
+    # --- Lay out the column blocks ---
+    header = {'version': COLUMNAR_VERSION, 'rows': 0, 'columns': {}}
+    blocks = []
+    offset = 0
+    for name, column in columns.items():
+        data = column['codes'] if isinstance(column, dict) else column
+        data = np.ascontiguousarray(data)
+        entry = {'dtype': data.dtype.str, 'offset': offset, 'nbytes': data.nbytes}
+        if isinstance(column, dict):
+            entry['values'] = column['values']
+
+        header['columns'][name] = entry
+        header['rows'] = len(data)
+        blocks.append(data)
+        offset += -(-data.nbytes // COLUMN_ALIGNMENT) * COLUMN_ALIGNMENT
+
+    # Block offsets are relative to the end of the padded header
+    header_bytes = json.dumps(header).encode('utf-8')
+    prefix = len(COLUMNAR_MAGIC) + 8 + len(header_bytes)
+    padding = -prefix % COLUMN_ALIGNMENT
+
+    directory = os.path.dirname(filename)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    with open(filename, 'wb') as f:
+        f.write(COLUMNAR_MAGIC)
+        f.write(struct.pack('<Q', len(header_bytes) + padding))
+        f.write(header_bytes + b' ' * padding)
+
+        for data in blocks:
+            f.write(data.tobytes())
+            f.write(b'\0' * (-data.nbytes % COLUMN_ALIGNMENT))
+
+    print(f"Enriched data saved to {filename}")
+    return header['rows']
+
+
+def load_enriched_columnar(filename, columns=None):
+    """
+    Memory-maps a binary columnar file.
+
+    Only the requested columns are mapped, and no data is copied until it is
+    touched. Encoded columns come back as {'codes', 'values'} like the
+    transaction table, so the table_* functions work on the result.
+
+    Returns: dict of read-only NumPy columns plus 'size'
+    """
+
+    with open(filename, 'rb') as f:
+        if f.read(len(COLUMNAR_MAGIC)) != COLUMNAR_MAGIC:
+            raise ValueError(f"{filename} is not a columnar sales file")
+        (header_length,) = struct.unpack('<Q', f.read(8))
+        header = json.loads(f.read(header_length))
+
+    if header.get('version') != COLUMNAR_VERSION:
+        raise ValueError(f"Unsupported columnar file version: {header.get('version')}")
+
+    data_start = len(COLUMNAR_MAGIC) + 8 + header_length
+    rows = header['rows']
+    table = {'size': rows}
+
+    for name in columns or header['columns']:
+        entry = header['columns'][name]
+        dtype = np.dtype(entry['dtype'])
+
+        if rows == 0 or entry['nbytes'] == 0:
+            data = np.zeros(0, dtype=dtype)
+        else:
+            data = np.memmap(
+                filename, dtype=dtype, mode='r',
+                offset=data_start + entry['offset'], shape=(rows,)
+            )
+
+        if 'values' in entry:
+            table[name] = {'codes': data, 'values': entry['values']}
+        else:
+            table[name] = data
+
+    return table
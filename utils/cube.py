@@ -0,0 +1,266 @@
+from datetime import date, timedelta
+from functools import lru_cache
+
+
+CUBE_MEASURES = ('revenue', 'quantity', 'transaction_count')
+CUBE_GRAINS = ('day', 'week', 'month', 'quarter', 'year')
+
+
+def new_sales_cube():
+    """
+    Creates an empty date × region × product cube.
+
+    Each cell holds the revenue, quantity and transaction count of one
+    (Date, Region, ProductName) combination, so time-sliced questions can
+    be answered from the cells without touching rows.
+    """
+    return {'cells': {}}
+
+
+def update_sales_cube(cube, transactions):
+    """
+    Folds transactions into an existing cube in a single pass.
+
+    Returns: the updated cube
+    """
+
+    cells = cube['cells']
+
+    for t in transactions:
+        qty = t['Quantity']
+        key = (t['Date'], t['Region'], t['ProductName'])
+
+        stats = cells.get(key)
+        if stats is None:
+            stats = cells[key] = {'revenue': 0.0, 'quantity': 0, 'transaction_count': 0}
+        stats['revenue'] += qty * t['UnitPrice']
+        stats['quantity'] += qty
+        stats['transaction_count'] += 1
+
+    return cube
+
+
+def merge_sales_cube(cube, other):
+    """
+    Folds another cube (e.g. built by a parallel worker) into cube.
+
+    Returns: the updated cube
+    """
+
+    cells = cube['cells']
+    for key, stats in other['cells'].items():
+        current = cells.get(key)
+        if current is None:
+            cells[key] = dict(stats)
+            continue
+        for measure, value in stats.items():
+            current[measure] += value
+
+    return cube
+
+
+def build_sales_cube(transactions):
+    """
+    Builds the cube in one scan of the data.
+    """
+    return update_sales_cube(new_sales_cube(), transactions)
+
+
+@lru_cache(maxsize=None)
+def _parse_date(text):
+    """
+    Parses an ISO YYYY-MM-DD date, or returns None.
+    """
+    try:
+        return date.fromisoformat(text)
+    except (TypeError, ValueError):
+        return None
+
+
+@lru_cache(maxsize=None)
+def period_key(text, grain='day'):
+    """
+    Maps a Date value to its period label: 2024-12-05 (day), 2024-W49
+    (ISO week), 2024-12 (month), 2024-Q4 (quarter) or 2024 (year).
+
+    Dates that are not ISO YYYY-MM-DD keep their raw value at the day
+    grain and map to None (left out of rollups) at coarser grains.
+
+    Returns: period label (sortable as text), or None
+    """
+
+    if grain not in CUBE_GRAINS:
+        raise ValueError(f"grain must be one of {CUBE_GRAINS}, not {grain!r}")
+
+    d = _parse_date(text)
+    if d is None:
+        return text if grain == 'day' else None
+
+    if grain == 'day':
+        return d.isoformat()
+    if grain == 'week':
+        year, week, _ = d.isocalendar()
+        return f"{year}-W{week:02d}"
+    if grain == 'month':
+        return f"{d.year}-{d.month:02d}"
+    if grain == 'quarter':
+        return f"{d.year}-Q{(d.month - 1) // 3 + 1}"
+    return str(d.year)
+
+
+def cube_slice(cube, start=None, end=None, regions=None, products=None):
+    """
+    Yields the cells inside a slice: dates in [start, end] (ISO strings,
+    inclusive, either open) and optional collections of regions / products.
+
+    Returns: iterator of ((date, region, product), stats)
+    """
+
+    regions = set(regions) if regions is not None else None
+    products = set(products) if products is not None else None
+
+    for key, stats in cube['cells'].items():
+        day, region, product = key
+        if start is not None and day < start:
+            continue
+        if end is not None and day > end:
+            continue
+        if regions is not None and region not in regions:
+            continue
+        if products is not None and product not in products:
+            continue
+        yield key, stats
+
+
+def cube_rollup(cube, grain='day', by=(), start=None, end=None, regions=None,
+                products=None):
+    """
+    Rolls the cube up to a time grain and optional dimensions.
+
+    by is a tuple of 'region' and/or 'product'. Filters are the same as
+    cube_slice.
+
+    Returns: dict sorted by key; keys are period labels, or
+    (period, *by values) tuples when by is given
+    """
+
+    positions = {'region': 1, 'product': 2}
+    for dim in by:
+        if dim not in positions:
+            raise ValueError(f"Unknown cube dimension {dim!r}; use 'region' or 'product'")
+
+    rollup = {}
+    for key, stats in cube_slice(cube, start, end, regions, products):
+        period = period_key(key[0], grain)
+        if period is None:
+            continue
+
+        group = (period, *(key[positions[dim]] for dim in by)) if by else period
+        current = rollup.get(group)
+        if current is None:
+            rollup[group] = dict(stats)
+            continue
+        for measure, value in stats.items():
+            current[measure] += value
+
+    return dict(sorted(rollup.items()))
+
+
+def _period_range(first, last, grain):
+    """
+    Lists every period label from the period of first to that of last
+    (ISO dates), including periods without sales.
+    """
+
+    d, stop = _parse_date(first), _parse_date(last)
+    periods = []
+
+    while d <= stop:
+        label = period_key(d.isoformat(), grain)
+        if not periods or periods[-1] != label:
+            periods.append(label)
+        d += timedelta(days=1)
+
+    return periods
+
+
+def _series(cube, grain, measure, filters):
+    """
+    One measure per period over the continuous range of the slice, with 0
+    for periods without sales.
+
+    Returns: list of (period, value)
+    """
+
+    if measure not in CUBE_MEASURES:
+        raise ValueError(f"measure must be one of {CUBE_MEASURES}, not {measure!r}")
+
+    days = [
+        day for day in cube_rollup(cube, 'day', **filters)
+        if _parse_date(day) is not None
+    ]
+    if not days:
+        return []
+
+    rollup = cube_rollup(cube, grain, **filters)
+    return [
+        (period, rollup[period][measure] if period in rollup else 0)
+        for period in _period_range(days[0], days[-1], grain)
+    ]
+
+
+def rolling_revenue(cube, window=7, grain='day', measure='revenue', **filters):
+    """
+    Rolling-window totals and averages of a measure over consecutive
+    periods (e.g. the 7-day moving revenue). Periods without sales count
+    as 0; the first window - 1 periods cover fewer periods.
+
+    filters are passed to cube_slice (start, end, regions, products).
+
+    Returns: list of (period, value, rolling_total, rolling_average)
+    """
+
+    if window < 1:
+        raise ValueError("window must be at least 1")
+
+    series = _series(cube, grain, measure, filters)
+    result = []
+
+    for i, (period, value) in enumerate(series):
+        values = [v for _, v in series[max(i - window + 1, 0):i + 1]]
+        total = sum(values)
+        result.append((period, value, total, total / len(values)))
+
+    return result
+
+
+def period_over_period(cube, grain='month', measure='revenue', **filters):
+    """
+    Compares each period with the one before it.
+
+    filters are passed to cube_slice (start, end, regions, products).
+
+    Returns: list of dicts with period, value, previous, delta and
+    pct_change (None when there is no previous period or it was 0)
+    """
+
+    series = _series(cube, grain, measure, filters)
+    result = []
+    previous = None
+
+    for period, value in series:
+        delta = pct_change = None
+        if previous is not None:
+            delta = value - previous
+            if previous:
+                pct_change = delta / previous * 100
+        result.append({
+            'period': period,
+            'value': value,
+            'previous': previous,
+            'delta': delta,
+            'pct_change': pct_change
+        })
+        previous = value
+
+    return result
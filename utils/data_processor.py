@@ -1,46 +1,350 @@
-def calculate_total_revenue(transactions):
+import heapq
+from functools import partial
+
+from utils.sketches import (
+    hll_add,
+    hll_copy,
+    hll_count,
+    hll_merge,
+    new_hll,
+    new_space_saving,
+    space_saving_add,
+    space_saving_top
+)
+
+
+def new_sales_aggregates(distinct='exact', precision=12):
     """
-    Calculates total revenue from all transactions.
+    Creates an empty aggregate state.
+
+    The state holds the per-region, per-product, per-customer and per-date
+    running totals that every analysis function below is a view over.
+
+    distinct='hll' replaces the exact sets behind unique customers per day
+    and distinct products per customer with HyperLogLog sketches of the
+    given precision, so their memory no longer grows with cardinality.
     """
-    total = 0.0
 
-    for t in transactions:
-        total += t['Quantity'] * t['UnitPrice']
+    if distinct not in ('exact', 'hll'):
+        raise ValueError(f"distinct must be 'exact' or 'hll', not {distinct!r}")
 
-    return total
+    return {
+        'distinct': distinct,
+        'precision': precision,
+        'total_revenue': 0.0,
+        'transaction_count': 0,
+        'regions': {},
+        'products': {},
+        'customers': {},
+        'daily': {}
+    }
 
 
-def region_wise_sales(transactions):
+def update_sales_aggregates(aggregates, transactions):
     """
-    Analyzes sales by region.
+    Folds transactions into an existing aggregate state in a single pass.
+
+    Returns: the updated aggregate state
     """
 
-    region_stats = {}
+    regions = aggregates['regions']
+    products = aggregates['products']
+    customers = aggregates['customers']
+    daily = aggregates['daily']
+
+    total = aggregates['total_revenue']
+    count = aggregates['transaction_count']
+
+    # --- Exact sets or HyperLogLog sketches for distinct counts ---
+    if aggregates['distinct'] == 'hll':
+        new_distinct = partial(new_hll, aggregates['precision'])
+        add_distinct = hll_add
+    else:
+        new_distinct = set
+        add_distinct = set.add
 
-    # --- Aggregate totals per region ---
     for t in transactions:
-        region = t['Region']
-        amount = t['Quantity'] * t['UnitPrice']
+        qty = t['Quantity']
+        amount = qty * t['UnitPrice']
+        name = t['ProductName']
+        cid = t['CustomerID']
+        date = t['Date']
+
+        total += amount
+        count += 1
 
-        if region not in region_stats:
-            region_stats[region] = {
+        # --- Region totals ---
+        stats = regions.get(t['Region'])
+        if stats is None:
+            stats = regions[t['Region']] = {
                 'total_sales': 0.0,
                 'transaction_count': 0
             }
+        stats['total_sales'] += amount
+        stats['transaction_count'] += 1
+
+        # --- Product totals ---
+        stats = products.get(name)
+        if stats is None:
+            stats = products[name] = {
+                'total_qty': 0,
+                'total_revenue': 0.0
+            }
+        stats['total_qty'] += qty
+        stats['total_revenue'] += amount
+
+        # --- Customer totals ---
+        stats = customers.get(cid)
+        if stats is None:
+            stats = customers[cid] = {
+                'total_spent': 0.0,
+                'purchase_count': 0,
+                'products_bought': new_distinct()
+            }
+        stats['total_spent'] += amount
+        stats['purchase_count'] += 1
+        add_distinct(stats['products_bought'], name)
+
+        # --- Daily totals ---
+        stats = daily.get(date)
+        if stats is None:
+            stats = daily[date] = {
+                'revenue': 0.0,
+                'transaction_count': 0,
+                'unique_customers': new_distinct()
+            }
+        stats['revenue'] += amount
+        stats['transaction_count'] += 1
+        add_distinct(stats['unique_customers'], cid)
+
+    aggregates['total_revenue'] = total
+    aggregates['transaction_count'] = count
+
+    return aggregates
+
+
+def merge_sales_aggregates(aggregates, other):
+    """
+    Folds another aggregate state into aggregates.
+
+    States built over consecutive slices of the data merge, in order, into
+    the same keys and key order as one pass over all of it.
+
+    Returns: the updated aggregate state
+    """
+
+    if (aggregates['distinct'], aggregates['precision']) != (other['distinct'], other['precision']):
+        raise ValueError("Cannot merge aggregates built with different distinct modes")
+
+    aggregates['total_revenue'] += other['total_revenue']
+    aggregates['transaction_count'] += other['transaction_count']
+
+    for group in ('regions', 'products', 'customers', 'daily'):
+        target = aggregates[group]
+
+        for key, stats in other[group].items():
+            current = target.get(key)
+            if current is None:
+                target[key] = {
+                    field: _copy_distinct(value)
+                    for field, value in stats.items()
+                }
+                continue
+
+            for field, value in stats.items():
+                if isinstance(value, set):
+                    current[field] |= value
+                elif isinstance(value, dict):
+                    hll_merge(current[field], value)
+                else:
+                    current[field] += value
+
+    return aggregates
+
+
+def _copy_distinct(value):
+    """
+    Copies a set or sketch field; other values are returned as is.
+    """
+    if isinstance(value, set):
+        return set(value)
+    if isinstance(value, dict):
+        return hll_copy(value)
+    return value
+
+
+def _distinct_count(value):
+    """
+    Counts an exact set or estimates a HyperLogLog sketch.
+    """
+    return len(value) if isinstance(value, set) else hll_count(value)
+
+
+def aggregate_sales(transactions, distinct='exact', precision=12):
+    """
+    Builds the aggregate state for all analytics in one scan of the data.
+    """
+    return update_sales_aggregates(new_sales_aggregates(distinct, precision), transactions)
+
+
+def analyze_sales(transactions, n=5, threshold=10):
+    """
+    Runs the full analytics suite over a single aggregation pass.
+
+    n limits the top products and top customers (selected with bounded
+    heaps); threshold is passed to low_performing_products.
+
+    Returns: dict with the result of every analysis function
+    """
+
+    aggregates = _as_aggregates(transactions)
+
+    return {
+        'total_revenue': calculate_total_revenue(aggregates),
+        'region_sales': region_wise_sales(aggregates),
+        'top_products': top_selling_products(aggregates, n=n),
+        'customers': customer_analysis(aggregates, n=n),
+        'daily_trend': daily_sales_trend(aggregates),
+        'peak_day': find_peak_sales_day(aggregates),
+        'low_products': low_performing_products(aggregates, threshold=threshold)
+    }
+
+
+def _as_aggregates(transactions):
+    """
+    Accepts either a list of transactions or an aggregate state.
+    """
+    if isinstance(transactions, dict):
+        return transactions
+    return aggregate_sales(transactions)
+
+
+# --- Single-group scans for list input ---
+# A view called with plain transactions only needs its own group, so it
+# is built with a dedicated loop instead of the full aggregate state
+# (customer and daily sets included). Shapes match the aggregate groups.
+
+def _region_totals(transactions):
+    """
+    Per-region totals of a list of transactions.
+    """
+    regions = {}
+    for t in transactions:
+        stats = regions.get(t['Region'])
+        if stats is None:
+            stats = regions[t['Region']] = {'total_sales': 0.0, 'transaction_count': 0}
+        stats['total_sales'] += t['Quantity'] * t['UnitPrice']
+        stats['transaction_count'] += 1
+    return regions
+
+
+def _product_totals(transactions):
+    """
+    Per-product totals of a list of transactions.
+    """
+    products = {}
+    for t in transactions:
+        qty = t['Quantity']
+        stats = products.get(t['ProductName'])
+        if stats is None:
+            stats = products[t['ProductName']] = {'total_qty': 0, 'total_revenue': 0.0}
+        stats['total_qty'] += qty
+        stats['total_revenue'] += qty * t['UnitPrice']
+    return products
+
+
+def _customer_totals(transactions):
+    """
+    Per-customer totals of a list of transactions.
+    """
+    customers = {}
+    for t in transactions:
+        stats = customers.get(t['CustomerID'])
+        if stats is None:
+            stats = customers[t['CustomerID']] = {
+                'total_spent': 0.0, 'purchase_count': 0, 'products_bought': set()
+            }
+        stats['total_spent'] += t['Quantity'] * t['UnitPrice']
+        stats['purchase_count'] += 1
+        stats['products_bought'].add(t['ProductName'])
+    return customers
+
+
+def _daily_totals(transactions, customers=True):
+    """
+    Per-date totals; customers=False skips the unique customer sets.
+    """
+    daily = {}
+    for t in transactions:
+        stats = daily.get(t['Date'])
+        if stats is None:
+            stats = daily[t['Date']] = {'revenue': 0.0, 'transaction_count': 0}
+            if customers:
+                stats['unique_customers'] = set()
+        stats['revenue'] += t['Quantity'] * t['UnitPrice']
+        stats['transaction_count'] += 1
+        if customers:
+            stats['unique_customers'].add(t['CustomerID'])
+    return daily
+
+
+def _group(transactions, group):
+    """
+    Returns one group of an aggregate state, or scans a list of
+    transactions for just that group.
+    """
+
+    if isinstance(transactions, dict):
+        return transactions[group]
+    if group == 'regions':
+        return _region_totals(transactions)
+    if group == 'products':
+        return _product_totals(transactions)
+    if group == 'customers':
+        return _customer_totals(transactions)
+    return _daily_totals(transactions)
 
-        region_stats[region]['total_sales'] += amount
-        region_stats[region]['transaction_count'] += 1
+
+
+def calculate_total_revenue(transactions):
+    """
+    Calculates total revenue from all transactions.
+    """
+
+    if isinstance(transactions, dict):
+        return transactions['total_revenue']
+
+    total = 0.0
+    for t in transactions:
+        total += t['Quantity'] * t['UnitPrice']
+    return total
+
+
+def region_wise_sales(transactions):
+    """
+    Analyzes sales by region.
+    """
+
+    regions = _group(transactions, 'regions')
 
     # --- Compute overall total for percentage calculation ---
-    overall_total = sum(r['total_sales'] for r in region_stats.values())
+    overall_total = sum(r['total_sales'] for r in regions.values())
 
-    # --- Add percentage field ---
-    for region, stats in region_stats.items():
+    region_stats = {}
+    for region, totals in regions.items():
+        stats = {
+            'total_sales': totals['total_sales'],
+            'transaction_count': totals['transaction_count']
+        }
+
+        # --- Add percentage field ---
         if overall_total > 0:
             stats['percentage'] = round((stats['total_sales'] / overall_total) * 100, 2)
         else:
             stats['percentage'] = 0.0
 
+        region_stats[region] = stats
+
     # --- Sort by total_sales descending ---
     region_stats = dict(
         sorted(region_stats.items(), key=lambda x: x[1]['total_sales'], reverse=True)
@@ -54,63 +358,54 @@ def top_selling_products(transactions, n=5):
     Finds top n products by total quantity sold.
     """
 
-    product_stats = {}
-
-    # --- Aggregate totals per product ---
-    for t in transactions:
-        name = t['ProductName']
-        qty = t['Quantity']
-        revenue = t['Quantity'] * t['UnitPrice']
-
-        if name not in product_stats:
-            product_stats[name] = {
-                'total_qty': 0,
-                'total_revenue': 0.0
-            }
-
-        product_stats[name]['total_qty'] += qty
-        product_stats[name]['total_revenue'] += revenue
-
-    # --- Convert to list of tuples ---
-    results = [
-        (name, stats['total_qty'], stats['total_revenue'])
-        for name, stats in product_stats.items()
-    ]
-
-    # --- Sort by total quantity sold (descending) ---
-    results.sort(key=lambda x: x[1], reverse=True)
-
-    # --- Return top n ---
-    return results[:n]
-
+    products = _group(transactions, 'products')
+
+    # --- Keep the n best by total quantity in a bounded heap ---
+    # (nlargest is equivalent to a stable sort descending, sliced to n)
+    return heapq.nlargest(
+        n,
+        (
+            (name, stats['total_qty'], stats['total_revenue'])
+            for name, stats in products.items()
+        ),
+        key=lambda x: x[1]
+    )
 
 
-def customer_analysis(transactions):
+def customer_analysis(transactions, n=None):
     """
     Analyzes customer purchase patterns.
-    """
 
-    customer_stats = {}
+    With n set, only the top n customers by total_spent are returned,
+    selected with a bounded heap instead of sorting every customer.
 
-    # --- Aggregate per customer ---
-    for t in transactions:
-        cid = t['CustomerID']
-        amount = t['Quantity'] * t['UnitPrice']
-        product = t['ProductName']
+    For aggregates built with distinct='hll', products_bought is replaced
+    by an estimated distinct_products count.
+    """
 
-        if cid not in customer_stats:
-            customer_stats[cid] = {
-                'total_spent': 0.0,
-                'purchase_count': 0,
-                'products_bought': set()   # use set for uniqueness
-            }
+    customers = _group(transactions, 'customers')
 
-        customer_stats[cid]['total_spent'] += amount
-        customer_stats[cid]['purchase_count'] += 1
-        customer_stats[cid]['products_bought'].add(product)
+    # --- Order by total_spent descending ---
+    if n is None:
+        ranked = sorted(customers.items(), key=lambda x: x[1]['total_spent'], reverse=True)
+    else:
+        ranked = heapq.nlargest(n, customers.items(), key=lambda x: x[1]['total_spent'])
+
+    customer_stats = {}
 
     # --- Compute averages and convert sets to lists ---
-    for cid, stats in customer_stats.items():
+    for cid, totals in ranked:
+        stats = {
+            'total_spent': totals['total_spent'],
+            'purchase_count': totals['purchase_count']
+        }
+
+        bought = totals['products_bought']
+        if isinstance(bought, set):
+            stats['products_bought'] = sorted(bought)
+        else:
+            stats['distinct_products'] = hll_count(bought)
+
         if stats['purchase_count'] > 0:
             stats['avg_order_value'] = round(
                 stats['total_spent'] / stats['purchase_count'], 2
@@ -118,48 +413,77 @@ def customer_analysis(transactions):
         else:
             stats['avg_order_value'] = 0.0
 
-        stats['products_bought'] = sorted(list(stats['products_bought']))
-
-    # --- Sort by total_spent descending ---
-    customer_stats = dict(
-        sorted(customer_stats.items(), key=lambda x: x[1]['total_spent'], reverse=True)
-    )
+        customer_stats[cid] = stats
 
     return customer_stats
 
 
-def daily_sales_trend(transactions):
+def _heavy_hitters(transactions, key, by, n, capacity):
     """
-    Analyzes sales trends by date.
+    Streams transactions through a Space-Saving sketch keyed on one field.
     """
 
-    daily = {}
+    if by not in ('revenue', 'quantity'):
+        raise ValueError(f"by must be 'revenue' or 'quantity', not {by!r}")
+
+    sketch = new_space_saving(capacity)
 
-    # --- Aggregate per date ---
     for t in transactions:
-        date = t['Date']
-        amount = t['Quantity'] * t['UnitPrice']
-        customer = t['CustomerID']
+        if by == 'revenue':
+            weight = t['Quantity'] * t['UnitPrice']
+        else:
+            weight = t['Quantity']
+        space_saving_add(sketch, t[key], weight)
 
-        if date not in daily:
-            daily[date] = {
-                'revenue': 0.0,
-                'transaction_count': 0,
-                'unique_customers': set()
-            }
+    return space_saving_top(sketch, n)
 
-        daily[date]['revenue'] += amount
-        daily[date]['transaction_count'] += 1
-        daily[date]['unique_customers'].add(customer)
+
+def approximate_top_customers(transactions, n=10, by='revenue', capacity=10000):
+    """
+    Finds the heaviest customers in one pass with bounded memory.
+
+    Only capacity customers are tracked at a time (Space-Saving), so any
+    iterable of transactions works, including a streamed file.
+
+    Returns: list of (CustomerID, estimate, error); the true total lies in
+    [estimate - error, estimate]
+    """
+    return _heavy_hitters(transactions, 'CustomerID', by, n, capacity)
+
+
+def approximate_top_products(transactions, n=10, by='quantity', capacity=10000):
+    """
+    Finds the heaviest products in one pass with bounded memory.
+
+    Returns: list of (ProductName, estimate, error); see
+    approximate_top_customers
+    """
+    return _heavy_hitters(transactions, 'ProductName', by, n, capacity)
+
+
+def daily_sales_trend(transactions):
+    """
+    Analyzes sales trends by date.
+
+    unique_customers is an estimate for aggregates built with distinct='hll'.
+    """
+
+    daily = _group(transactions, 'daily')
 
     # --- Convert sets to counts ---
-    for date, stats in daily.items():
-        stats['unique_customers'] = len(stats['unique_customers'])
+    trend = {
+        date: {
+            'revenue': stats['revenue'],
+            'transaction_count': stats['transaction_count'],
+            'unique_customers': _distinct_count(stats['unique_customers'])
+        }
+        for date, stats in daily.items()
+    }
 
     # --- Sort chronologically ---
-    daily = dict(sorted(daily.items(), key=lambda x: x[0]))
+    trend = dict(sorted(trend.items(), key=lambda x: x[0]))
 
-    return daily
+    return trend
 
 
 def find_peak_sales_day(transactions):
@@ -167,21 +491,11 @@ def find_peak_sales_day(transactions):
     Identifies the date with highest revenue.
     """
 
-    daily = {}
-
-    # --- Aggregate revenue and transaction count per date ---
-    for t in transactions:
-        date = t['Date']
-        amount = t['Quantity'] * t['UnitPrice']
-
-        if date not in daily:
-            daily[date] = {
-                'revenue': 0.0,
-                'transaction_count': 0
-            }
-
-        daily[date]['revenue'] += amount
-        daily[date]['transaction_count'] += 1
+    if isinstance(transactions, dict):
+        daily = transactions['daily']
+    else:
+        # Only revenue and counts are needed, not the customer sets
+        daily = _daily_totals(transactions, customers=False)
 
     # --- Find the date with the highest revenue ---
     if not daily:
@@ -198,27 +512,12 @@ def low_performing_products(transactions, threshold=10):
     Identifies products with low sales.
     """
 
-    product_stats = {}
-
-    # --- Aggregate totals per product ---
-    for t in transactions:
-        name = t['ProductName']
-        qty = t['Quantity']
-        revenue = t['Quantity'] * t['UnitPrice']
-
-        if name not in product_stats:
-            product_stats[name] = {
-                'total_qty': 0,
-                'total_revenue': 0.0
-            }
-
-        product_stats[name]['total_qty'] += qty
-        product_stats[name]['total_revenue'] += revenue
+    products = _group(transactions, 'products')
 
     # --- Filter products below threshold ---
     low_products = [
         (name, stats['total_qty'], stats['total_revenue'])
-        for name, stats in product_stats.items()
+        for name, stats in products.items()
         if stats['total_qty'] < threshold
     ]
 
@@ -1,52 +1,277 @@
-def read_sales_data(filename):
+import codecs
+import glob
+import mmap
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from utils.data_processor import (
+    merge_sales_aggregates,
+    new_sales_aggregates,
+    update_sales_aggregates
+)
+from utils.indexing import filter_transactions, transaction_overview
+from utils.records import make_sales_record
+from utils.validation import (
+    BAD_NUMBER_PREFIX,
+    MALFORMED_FIELD_COUNT,
+    check_transaction,
+    open_quarantine,
+    write_quarantine,
+    write_quarantine_line
+)
+
+
+ENCODINGS_TO_TRY = ['utf-8', 'latin-1', 'cp1252']
+
+# Codecs that map every byte value, so they can never fail to decode
+SINGLE_BYTE_TOTAL_ENCODINGS = {'latin-1', 'latin1', 'iso-8859-1'}
+
+def detect_encoding(data, encodings=ENCODINGS_TO_TRY, chunk_size=1 << 20):
     """
-    Reads sales data from file handling encoding issues.
+    Finds the first encoding that decodes the whole buffer.
 
-    Returns: list of raw lines (strings)
+    data is a bytes-like object (usually a memory-mapped file), decoded
+    chunk by chunk so no full-size string is ever built. A failure partway
+    through moves on to the next encoding without re-reading the file, and
+    total codecs such as latin-1 are accepted without a scan.
+
+    Returns: encoding name, or None if no encoding fits
     """
 
-    encodings_to_try = ['utf-8', 'latin-1', 'cp1252']
+    for enc in encodings:
+        if enc.lower() in SINGLE_BYTE_TOTAL_ENCODINGS:
+            return enc
 
-    for enc in encodings_to_try:
+        decoder = codecs.getincrementaldecoder(enc)()
         try:
-            with open(filename, 'r', encoding=enc) as f:
-                lines = f.readlines()
-            break  # Successfully read the file, exit loop
-        except FileNotFoundError:
-            print(f"Error: File '{filename}' not found.")
-            return []
+            for start in range(0, len(data), chunk_size):
+                decoder.decode(data[start:start + chunk_size])
+            decoder.decode(b'', final=True)
+            return enc
         except UnicodeDecodeError:
             # Try next encoding
             continue
 
-    # If all encodings failed
-    if not lines:
-        print("Error: Unable to decode file with supported encodings.")
-        return []
+    return None
 
-    # Strip whitespace, skip header, remove empty lines
-    cleaned = [
-        line.strip()
-        for line in lines[1:]  # skip header row
-        if line.strip()        # remove empty lines
-    ]
 
-    return cleaned
+def iter_range_lines(mm, start, end, encoding, chunk_size=1 << 20):
+    """
+    Streams cleaned lines from the byte range [start, end) of a mapped file.
+
+    start and end must sit on line boundaries. Newline-aligned blocks are
+    decoded incrementally; empty lines are skipped and whitespace stripped.
+    """
+
+    while start < end:
+        # Cut each block at a newline so no line is split
+        stop = end
+        if start + chunk_size < end:
+            cut = mm.rfind(b'\n', start, start + chunk_size)
+            if cut != -1:
+                stop = cut + 1
+
+        for line in mm[start:stop].decode(encoding).split('\n'):
+            line = line.strip()
+            if line:  # remove empty lines
+                yield line
+        start = stop
+
+
+def header_end(mm):
+    """
+    Returns the byte offset just past the header row.
+    """
+    end = mm.find(b'\n')
+    return len(mm) if end == -1 else end + 1
+
+
+def iter_sales_lines(filename, encoding=None, chunk_size=1 << 20):
+    """
+    Streams cleaned raw lines from a sales file.
+
+    The file is memory-mapped and read once: the encoding is detected on
+    the mapped bytes, then newline-aligned blocks are decoded incrementally.
+    Skips the header row and empty lines, strips whitespace.
+    """
+
+    try:
+        with open(filename, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return
+
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                if encoding is None:
+                    encoding = detect_encoding(mm, chunk_size=chunk_size)
+                    if encoding is None:
+                        print("Error: Unable to decode file with supported encodings.")
+                        return
+
+                yield from iter_range_lines(
+                    mm, header_end(mm), len(mm), encoding, chunk_size
+                )
+
+    except FileNotFoundError:
+        print(f"Error: File '{filename}' not found.")
+
+
+def resolve_sales_inputs(source):
+    """
+    Expands an input path into the sales files it names: a single file, a
+    directory of partitions (every file in it) or a glob pattern such as
+    data/partitions/*/sales_*.txt.
+
+    Returns: sorted list of file paths; a plain path is returned as is, so
+    a missing file is still reported by the reader
+    """
+
+    if os.path.isdir(source):
+        return sorted(
+            entry.path for entry in os.scandir(source)
+            if entry.is_file() and not entry.name.startswith('.')
+        )
+
+    if any(c in source for c in '*?['):
+        return sorted(path for path in glob.glob(source) if os.path.isfile(path))
+
+    return [source]
+
+
+def iter_partition_lines(source, chunk_size=1 << 20):
+    """
+    Streams cleaned raw lines from every partition of source in order.
+
+    Each partition carries its own header row and may use its own encoding.
+    """
+
+    filenames = resolve_sales_inputs(source)
+    if not filenames:
+        print(f"Error: No sales files match '{source}'.")
+
+    for filename in filenames:
+        yield from iter_sales_lines(filename, chunk_size=chunk_size)
+
+
+def read_sales_data(filename):
+    """
+    Reads sales data from a file, directory or glob of partitions, handling
+    encoding issues.
+
+    Returns: list of raw lines (strings)
+    """
+    return list(iter_partition_lines(filename))
+
+
+def parse_line(line, expected_fields=8):
+    """
+    Parses and cleans a single pipe-delimited sales line.
+
+    Returns: tuple of the 8 cleaned field values, or None for malformed rows
+    """
+
+    parts = line.split("|")
+
+    # Skip malformed rows
+    if len(parts) != expected_fields:
+        return None
+
+    (
+        transaction_id,
+        date,
+        product_id,
+        product_name,
+        quantity,
+        unit_price,
+        customer_id,
+        region
+    ) = parts
+
+    # Clean product name (remove commas inside names)
+    product_name = product_name.replace(",", " ")
+
+    # Clean numeric fields
+    quantity = quantity.replace(",", "")
+    unit_price = unit_price.replace(",", "")
+
+    # Convert types safely
+    try:
+        quantity = int(quantity)
+        unit_price = float(unit_price)
+    except ValueError:
+        # Skip rows with invalid numeric values
+        return None
+
+    return (
+        transaction_id,
+        date,
+        product_id,
+        product_name,
+        quantity,
+        unit_price,
+        customer_id,
+        region
+    )
+
+
+def line_reject_reason(line, expected_fields=8):
+    """
+    Explains why parse_line rejected a line.
+
+    Returns: malformed_field_count, bad_number_<Field>, or None if the
+    line parses
+    """
+
+    parts = line.split("|")
+    if len(parts) != expected_fields:
+        return MALFORMED_FIELD_COUNT
+
+    for field, position, convert in (('Quantity', 4, int), ('UnitPrice', 5, float)):
+        try:
+            convert(parts[position].replace(",", ""))
+        except ValueError:
+            return BAD_NUMBER_PREFIX + field
+    return None
 
 
-def parse_transactions(raw_lines):
+def parse_transactions(raw_lines, compact=False, summary=None, quarantine=None):
     """
     Parses raw lines into clean list of dictionaries.
+
+    compact=True returns SalesRecord objects instead: slotted rows with
+    interned text fields and the same dict-style access.
+
+    Lines that do not parse are counted into summary (a filter summary,
+    see new_filter_summary) and written to quarantine, as in
+    iter_transactions.
     """
 
-    parsed = []
-    expected_fields = 8
+    return list(iter_transactions(raw_lines, compact, summary, quarantine))
+
+
+def iter_transactions(raw_lines, compact=False, summary=None, quarantine=None):
+    """
+    Streams parsed transaction dictionaries (or SalesRecords) from raw lines.
+
+    Lines that do not parse are skipped. With summary (see
+    new_filter_summary) they count towards total_input, invalid and
+    invalid_reasons under their line_reject_reason code, and with
+    quarantine (from utils.validation.open_quarantine) the raw line is
+    written out with that code.
+    """
+
+    track = summary is not None or quarantine is not None
 
     for line in raw_lines:
-        parts = line.split("|")
+        fields = parse_line(line)
 
-        # Skip malformed rows
-        if len(parts) != expected_fields:
+        # Skip malformed rows and rows with invalid numeric values
+        if fields is None:
+            if track:
+                _reject_line(line, summary, quarantine)
+            continue
+
+        if compact:
+            yield make_sales_record(fields)
             continue
 
         (
@@ -58,24 +283,9 @@ def parse_transactions(raw_lines):
             unit_price,
             customer_id,
             region
-        ) = parts
-
-        # Clean product name (remove commas inside names)
-        product_name = product_name.replace(",", " ")
-
-        # Clean numeric fields
-        quantity = quantity.replace(",", "")
-        unit_price = unit_price.replace(",", "")
-
-        # Convert types safely
-        try:
-            quantity = int(quantity)
-            unit_price = float(unit_price)
-        except ValueError:
-            # Skip rows with invalid numeric values
-            continue
+        ) = fields
 
-        parsed.append({
+        yield {
             "TransactionID": transaction_id,
             "Date": date,
             "ProductID": product_id,
@@ -84,69 +294,105 @@ def parse_transactions(raw_lines):
             "UnitPrice": unit_price,
             "CustomerID": customer_id,
             "Region": region
-        })
+        }
 
-    return parsed
+
+def _reject_line(line, summary, quarantine):
+    """
+    Records one unparseable line in a filter summary and quarantine file.
+    """
+
+    reason = line_reject_reason(line)
+    if summary is not None:
+        summary['total_input'] += 1
+        summary['invalid'] += 1
+        reasons = summary['invalid_reasons']
+        reasons[reason] = reasons.get(reason, 0) + 1
+    if quarantine is not None:
+        write_quarantine_line(quarantine, line, reason)
 
 
-def validate_and_filter(transactions, region=None, min_amount=None, max_amount=None):
+def is_valid_transaction(t):
     """
-    Validates transactions and applies optional filters.
+    Checks a transaction against the validation schema (see
+    utils.validation).
     """
+    return check_transaction(t) is None
 
-    required_fields = [
-        'TransactionID', 'Date', 'ProductID', 'ProductName',
-        'Quantity', 'UnitPrice', 'CustomerID', 'Region'
-    ]
+
+def amount_ok(t, min_amount=None, max_amount=None):
+    """
+    Checks a transaction amount against optional bounds.
+    """
+    amt = t['Quantity'] * t['UnitPrice']
+    if min_amount is not None and amt < min_amount:
+        return False
+    if max_amount is not None and amt > max_amount:
+        return False
+    return True
+
+
+def validate_transactions(transactions, quarantine=None, reasons=None):
+    """
+    Splits transactions into valid and invalid ones.
+
+    quarantine (a file from utils.validation.open_quarantine) receives
+    every rejected row with its reason code as it is found; reasons (a
+    dict) is filled with reject counts per reason code.
+
+    Returns: (valid list, invalid list)
+    """
 
     valid = []
-    invalid_count = 0
+    invalid = []
+    if reasons is None:
+        reasons = {}
 
-    # --- VALIDATION PHASE ---
     for t in transactions:
-        # Check required fields exist and are non-empty
-        if any(f not in t or t[f] in (None, "") for f in required_fields):
-            invalid_count += 1
+        reason = check_transaction(t)
+        if reason is None:
+            valid.append(t)
             continue
 
-        # Validate ID formats
-        if not t['TransactionID'].startswith("T"):
-            invalid_count += 1
-            continue
-        if not t['ProductID'].startswith("P"):
-            invalid_count += 1
-            continue
-        if not t['CustomerID'].startswith("C"):
-            invalid_count += 1
-            continue
+        invalid.append(t)
+        reasons[reason] = reasons.get(reason, 0) + 1
+        if quarantine is not None:
+            write_quarantine(quarantine, t, reason)
 
-        # Validate numeric rules
-        if t['Quantity'] <= 0:
-            invalid_count += 1
-            continue
-        if t['UnitPrice'] <= 0:
-            invalid_count += 1
-            continue
+    return valid, invalid
 
-        valid.append(t)
+
+def validate_and_filter(transactions, region=None, min_amount=None, max_amount=None,
+                        quarantine=None, parse_summary=None):
+    """
+    Validates transactions and applies optional filters.
+
+    Rejected rows go to quarantine if given; summary['invalid_reasons']
+    counts them per reason code. parse_summary (the summary passed to
+    parse_transactions) adds the lines that did not parse.
+    """
+
+    # --- VALIDATION PHASE ---
+    reasons = {}
+    valid, invalid = validate_transactions(transactions, quarantine, reasons)
+    invalid_count = len(invalid)
 
     # --- FILTERING PHASE ---
     total_input = len(transactions)
+    regions_available, amount_range = transaction_overview(valid)
 
     # Show available regions
-    regions_available = sorted({t['Region'] for t in valid})
     print("Available regions:", regions_available)
 
     # Show transaction amount range
-    amounts = [t['Quantity'] * t['UnitPrice'] for t in valid]
-    if amounts:
-        print(f"Transaction amount range: min={min(amounts)}, max={max(amounts)}")
+    if amount_range:
+        print(f"Transaction amount range: min={amount_range[0]}, max={amount_range[1]}")
 
     # Filter by region
     filtered_by_region = 0
     if region:
         before = len(valid)
-        valid = [t for t in valid if t['Region'] == region]
+        valid = filter_transactions(valid, region=region)
         filtered_by_region = before - len(valid)
         print(f"After region filter ({region}): {len(valid)} records")
 
@@ -154,15 +400,7 @@ def validate_and_filter(transactions, region=None, min_amount=None, max_amount=N
     filtered_by_amount = 0
     if min_amount is not None or max_amount is not None:
         before = len(valid)
-        def amount_ok(t):
-            amt = t['Quantity'] * t['UnitPrice']
-            if min_amount is not None and amt < min_amount:
-                return False
-            if max_amount is not None and amt > max_amount:
-                return False
-            return True
-
-        valid = [t for t in valid if amount_ok(t)]
+        valid = filter_transactions(valid, min_amount=min_amount, max_amount=max_amount)
         filtered_by_amount = before - len(valid)
         print(f"After amount filter: {len(valid)} records")
 
@@ -170,27 +408,418 @@ def validate_and_filter(transactions, region=None, min_amount=None, max_amount=N
     summary = {
         'total_input': total_input,
         'invalid': invalid_count,
+        'invalid_reasons': reasons,
         'filtered_by_region': filtered_by_region,
         'filtered_by_amount': filtered_by_amount,
         'final_count': len(valid)
     }
+    if parse_summary is not None:
+        add_filter_summary(summary, parse_summary)
+        invalid_count = summary['invalid']
 
     return valid, invalid_count, summary
 
 
-# Step 1: Read raw lines from the file
-raw_lines = read_sales_data("sales_data.txt")
+def new_filter_summary():
+    """
+    Creates the counters that iter_validate_and_filter keeps up to date.
+    """
+    return {
+        'total_input': 0,
+        'invalid': 0,
+        'invalid_reasons': {},
+        'filtered_by_region': 0,
+        'filtered_by_amount': 0,
+        'final_count': 0
+    }
+
 
-# Step 2: Parse the cleaned transactions
-transactions = parse_transactions(raw_lines)
+def add_filter_summary(summary, other):
+    """
+    Adds the counts of one filter summary into another, including the
+    per-reason reject counts.
 
-# Step 3: Use the parsed data
-print(f"Loaded {len(transactions)} valid transactions")
-for t in transactions[:5]:   # show first 5
-    print(t)
+    Returns: summary
+    """
+    for key, value in other.items():
+        if isinstance(value, dict):
+            counts = summary.setdefault(key, {})
+            for reason, count in value.items():
+                counts[reason] = counts.get(reason, 0) + count
+        else:
+            summary[key] += value
+    return summary
+
+
+def iter_validate_and_filter(transactions, region=None, min_amount=None,
+                             max_amount=None, summary=None, quarantine=None):
+    """
+    Streaming counterpart of validate_and_filter.
 
-valid, invalid_count, summary = validate_and_filter(
-    transactions
-    region="South",
-    min_amount=2000
-)
+    Yields transactions that pass validation and the optional filters, and
+    updates summary (see new_filter_summary) as rows go by. Rejected rows
+    are streamed to quarantine if given.
+    """
+
+    if summary is None:
+        summary = new_filter_summary()
+    check_amount = min_amount is not None or max_amount is not None
+    reasons = summary['invalid_reasons']
+
+    for t in transactions:
+        summary['total_input'] += 1
+
+        reason = check_transaction(t)
+        if reason is not None:
+            summary['invalid'] += 1
+            reasons[reason] = reasons.get(reason, 0) + 1
+            if quarantine is not None:
+                write_quarantine(quarantine, t, reason)
+            continue
+        if region and t['Region'] != region:
+            summary['filtered_by_region'] += 1
+            continue
+        if check_amount and not amount_ok(t, min_amount, max_amount):
+            summary['filtered_by_amount'] += 1
+            continue
+
+        summary['final_count'] += 1
+        yield t
+
+
+def stream_sales_file(filename, region=None, min_amount=None, max_amount=None,
+                      aggregates=None, quarantine=None):
+    """
+    Reads, parses, validates, filters and aggregates a sales file (or a
+    directory / glob of partitions) as one chain of generators.
+
+    Only one row is held at a time, so peak memory depends on the number of
+    distinct regions, products, customers and dates, not on the file size.
+
+    Returns: (aggregates, summary)
+    """
+
+    if aggregates is None:
+        aggregates = new_sales_aggregates()
+    summary = new_filter_summary()
+
+    rows = iter_validate_and_filter(
+        iter_transactions(iter_partition_lines(filename), summary=summary, quarantine=quarantine),
+        region=region,
+        min_amount=min_amount,
+        max_amount=max_amount,
+        summary=summary,
+        quarantine=quarantine
+    )
+    update_sales_aggregates(aggregates, rows)
+
+    return aggregates, summary
+
+
+def split_sales_file(filename, parts):
+    """
+    Splits a sales file into newline-aligned byte ranges after the header.
+
+    Returns: (encoding, list of (start, end) offsets); encoding is None when
+    the file is missing, empty or cannot be decoded
+    """
+
+    try:
+        with open(filename, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return None, []
+
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                encoding = detect_encoding(mm)
+                if encoding is None:
+                    print("Error: Unable to decode file with supported encodings.")
+                    return None, []
+
+                start = header_end(mm)
+                size = len(mm)
+                step = max((size - start) // max(parts, 1), 1)
+
+                ranges = []
+                while start < size:
+                    end = mm.find(b'\n', min(start + step, size) - 1)
+                    end = size if end == -1 else end + 1
+                    ranges.append((start, end))
+                    start = end
+
+                return encoding, ranges
+
+    except FileNotFoundError:
+        print(f"Error: File '{filename}' not found.")
+        return None, []
+
+
+def split_sales_inputs(source, parts):
+    """
+    Plans the parallel work for a file, directory or glob of partitions.
+
+    Files larger than an even share of the total are split into
+    newline-aligned byte ranges; smaller files are batched together, so
+    thousands of small partitions become about `parts` tasks of similar
+    size instead of thousands of tiny ones. Whole files are read (and their
+    encoding detected) by the workers.
+
+    Returns: list of tasks, each a list of (filename, start, end, encoding)
+    with start/end/encoding None for a whole file
+    """
+
+    filenames = resolve_sales_inputs(source)
+    if not filenames:
+        print(f"Error: No sales files match '{source}'.")
+        return []
+
+    sizes = {}
+    for filename in filenames:
+        try:
+            sizes[filename] = os.path.getsize(filename)
+        except OSError:
+            sizes[filename] = 0
+
+    target = max(sum(sizes.values()) // max(parts, 1), 1)
+    tasks, current, current_bytes = [], [], 0
+
+    for filename in filenames:
+        pieces = sizes[filename] // target
+        if pieces > 1:
+            encoding, ranges = split_sales_file(filename, pieces)
+            ranges = [(filename, start, end, encoding) for start, end in ranges]
+        else:
+            ranges = [(filename, None, None, None)]
+
+        for item in ranges:
+            current.append(item)
+            current_bytes += sizes[filename] if item[1] is None else item[2] - item[1]
+            if current_bytes >= target:
+                tasks.append(current)
+                current, current_bytes = [], 0
+
+    if current:
+        tasks.append(current)
+
+    return tasks
+
+
+def _iter_task_lines(ranges):
+    """
+    Streams the raw lines of one task's file ranges in order.
+    """
+
+    for filename, start, end, encoding in ranges:
+        if start is None:
+            yield from iter_sales_lines(filename)
+            continue
+
+        with open(filename, 'rb') as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                yield from iter_range_lines(mm, start, end, encoding)
+
+
+def _process_ranges(task):
+    """
+    Worker (map step): parses, validates and filters the file ranges of one
+    task.
+
+    Returns: (transactions or partial aggregates, filter summary)
+    """
+
+    ranges, filters, aggregate, quarantine_part = task
+    # aggregate is False for row output, else (distinct, precision)
+    summary = new_filter_summary()
+
+    quarantine = None
+    if quarantine_part:
+        quarantine = open(quarantine_part, "w", encoding="utf-8")
+
+    try:
+        rows = iter_validate_and_filter(
+            iter_transactions(_iter_task_lines(ranges), summary=summary, quarantine=quarantine),
+            summary=summary,
+            quarantine=quarantine,
+            **filters
+        )
+
+        if aggregate:
+            return update_sales_aggregates(new_sales_aggregates(*aggregate), rows), summary
+        return list(rows), summary
+    finally:
+        if quarantine is not None:
+            quarantine.close()
+
+
+def _merge_filter_summaries(summaries):
+    """
+    Adds up per-chunk filter summaries.
+    """
+    total = new_filter_summary()
+    for summary in summaries:
+        add_filter_summary(total, summary)
+    return total
+
+
+def _run_parallel(source, filters, aggregate, workers, chunks_per_worker,
+                  quarantine_file=None):
+    """
+    Fans the partitions / byte ranges of source out to a process pool.
+
+    Results come back in file order. With quarantine_file, each worker
+    writes its rejects to a part file and the parts are joined in order.
+    """
+
+    workers = workers or os.cpu_count() or 1
+    tasks = [
+        (ranges, filters, aggregate, quarantine_file and f"{quarantine_file}.part{i}")
+        for i, ranges in enumerate(split_sales_inputs(source, workers * chunks_per_worker))
+    ]
+
+    if workers == 1 or len(tasks) <= 1:
+        results = [_process_ranges(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            # map() yields in submission order, which keeps rows deterministic
+            results = list(pool.map(_process_ranges, tasks))
+
+    if quarantine_file:
+        with open_quarantine(quarantine_file) as quarantine:
+            for *_, part in tasks:
+                with open(part, "r", encoding="utf-8") as f:
+                    quarantine.write(f.read())
+                os.remove(part)
+
+    return results
+
+
+def parse_sales_file_parallel(filename, region=None, min_amount=None,
+                              max_amount=None, workers=None, chunks_per_worker=4,
+                              quarantine_file=None):
+    """
+    Parses, validates and filters a sales file, directory or glob of
+    partitions on all cores.
+
+    Rows are returned in file order, the same as the sequential pipeline.
+
+    Returns: (valid transactions, summary)
+    """
+
+    filters = {'region': region, 'min_amount': min_amount, 'max_amount': max_amount}
+    results = _run_parallel(
+        filename, filters, False, workers, chunks_per_worker, quarantine_file
+    )
+
+    transactions = []
+    for rows, _ in results:
+        transactions.extend(rows)
+
+    return transactions, _merge_filter_summaries(s for _, s in results)
+
+
+def aggregate_sales_file_parallel(filename, region=None, min_amount=None,
+                                  max_amount=None, workers=None, chunks_per_worker=4,
+                                  distinct='exact', precision=12, quarantine_file=None):
+    """
+    Parallel counterpart of stream_sales_file, for a single file or a
+    directory / glob of partitions.
+
+    Map-reduce: each worker returns partial aggregates for its chunk of
+    files, so only the small per-key totals cross process boundaries, and
+    the partials are merged with merge_sales_aggregates. Revenue totals are summed per
+    chunk, so they can differ from a sequential sum in the last float digit.
+
+    Returns: (aggregates, summary)
+    """
+
+    filters = {'region': region, 'min_amount': min_amount, 'max_amount': max_amount}
+    results = _run_parallel(
+        filename, filters, (distinct, precision), workers, chunks_per_worker,
+        quarantine_file
+    )
+
+    aggregates = new_sales_aggregates(distinct, precision)
+    for partial, _ in results:
+        merge_sales_aggregates(aggregates, partial)
+
+    return aggregates, _merge_filter_summaries(s for _, s in results)
+
+
+ENRICHED_FIELDS = [
+    'TransactionID', 'Date', 'ProductID', 'ProductName', 'Quantity',
+    'UnitPrice', 'CustomerID', 'Region', 'API_Category', 'API_Brand',
+    'API_Rating', 'API_Match'
+]
+
+
+def _safe(v):
+    """
+    Converts None → empty string for safe writing.
+    """
+    return "" if v is None else str(v)
+
+
+def save_enriched_data(enriched_transactions, filename='data/enriched_sales_data.txt',
+                       batch_size=10000, fmt='pipe'):
+    """
+    Saves enriched transactions to file in pipe-delimited format.
+
+    Rows are formatted in batches and written through one buffered file
+    handle; enriched_transactions may be any iterable, including the
+    generator from iter_enriched_sales. fmt='columnar' writes the binary
+    columnar format instead (see utils.columnar.save_enriched_columnar).
+
+    Returns: number of rows written
+    """
+
+    if fmt == 'columnar':
+        from utils.columnar import save_enriched_columnar
+        return save_enriched_columnar(enriched_transactions, filename)
+    if fmt != 'pipe':
+        raise ValueError(f"Unknown enriched data format: {fmt}")
+
+    # Ensure output directory exists
+    directory = os.path.dirname(filename)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    count = 0
+    batch = []
+
+    with open(filename, "w", encoding="utf-8", buffering=1 << 20) as f:
+        f.write("|".join(ENRICHED_FIELDS) + "\n")
+
+        for t in enriched_transactions:
+            batch.append("|".join([_safe(t.get(field)) for field in ENRICHED_FIELDS]))
+
+            if len(batch) >= batch_size:
+                f.write("\n".join(batch) + "\n")
+                count += len(batch)
+                batch = []
+
+        if batch:
+            f.write("\n".join(batch) + "\n")
+            count += len(batch)
+
+    print(f"Enriched data saved to {filename}")
+    return count
+
+
+if __name__ == "__main__":
+    # Step 1: Read raw lines from the file
+    raw_lines = read_sales_data("sales_data.txt")
+
+    # Step 2: Parse the cleaned transactions
+    parse_summary = new_filter_summary()
+    transactions = parse_transactions(raw_lines, summary=parse_summary)
+
+    # Step 3: Use the parsed data
+    print(f"Loaded {len(transactions)} valid transactions")
+    for t in transactions[:5]:   # show first 5
+        print(t)
+
+    valid, invalid_count, summary = validate_and_filter(
+        transactions,
+        region="South",
+        min_amount=2000,
+        parse_summary=parse_summary
+    )
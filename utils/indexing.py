@@ -0,0 +1,154 @@
+from bisect import bisect_left, bisect_right
+
+
+# Amount ranges matching more than this share of the rows are answered by
+# a scan in row order, which beats sorting that many positions
+SCAN_FRACTION = 0.25
+
+
+def transaction_overview(transactions):
+    """
+    Finds the regions and the amount range of transactions in one linear
+    pass, without building an index.
+
+    Returns: (sorted list of regions, (min, max) amount or None if empty)
+    """
+
+    regions = set()
+    low = high = None
+
+    for t in transactions:
+        regions.add(t['Region'])
+        amount = t['Quantity'] * t['UnitPrice']
+        if low is None or amount < low:
+            low = amount
+        if high is None or amount > high:
+            high = amount
+
+    return sorted(regions), (None if low is None else (low, high))
+
+
+def build_transaction_index(transactions):
+    """
+    Builds lookup indexes over a loaded list of transactions.
+
+    Worth it when one dataset is filtered repeatedly; a single filter is
+    cheaper as a scan (filter_transactions on the list).
+
+    - by_region: hash index of Region → row positions (ascending)
+    - row_amounts: Quantity * UnitPrice of every row, in row order
+    - amounts / amount_order: the same amounts sorted, with the row
+      position of each sorted amount
+
+    Returns: index dict; it keeps a reference to transactions
+    """
+
+    by_region = {}
+    amounts = []
+
+    for pos, t in enumerate(transactions):
+        by_region.setdefault(t['Region'], []).append(pos)
+        amounts.append(t['Quantity'] * t['UnitPrice'])
+
+    amount_order = sorted(range(len(amounts)), key=amounts.__getitem__)
+
+    return {
+        'transactions': transactions,
+        'by_region': by_region,
+        'row_amounts': amounts,
+        'amounts': [amounts[pos] for pos in amount_order],
+        'amount_order': amount_order
+    }
+
+
+def index_regions(index):
+    """
+    Lists the regions present in the index, sorted.
+    """
+    return sorted(index['by_region'])
+
+
+def index_amount_range(index):
+    """
+    Returns the (min, max) transaction amount, or None if the index is empty.
+    """
+    if not index['amounts']:
+        return None
+    return index['amounts'][0], index['amounts'][-1]
+
+
+def _amount_bounds(index, min_amount=None, max_amount=None):
+    """
+    Slice [lo, hi) of the sorted amounts inside [min_amount, max_amount],
+    found by bisection.
+    """
+
+    amounts = index['amounts']
+    lo = 0 if min_amount is None else bisect_left(amounts, min_amount)
+    hi = len(amounts) if max_amount is None else bisect_right(amounts, max_amount)
+    return lo, hi
+
+
+def _open_bounds(min_amount, max_amount):
+    """
+    Returns (low, high) bounds with open sides as infinities.
+    """
+    low = float('-inf') if min_amount is None else min_amount
+    high = float('inf') if max_amount is None else max_amount
+    return low, high
+
+
+def query_positions(index, region=None, min_amount=None, max_amount=None):
+    """
+    Finds the row positions matching the region and amount filters.
+
+    Returns: sorted list of positions into index['transactions']
+    """
+
+    by_amount = min_amount is not None or max_amount is not None
+
+    if not region and not by_amount:
+        return list(range(len(index['transactions'])))
+
+    if not by_amount:
+        return list(index['by_region'].get(region, []))
+
+    lo, hi = _amount_bounds(index, min_amount, max_amount)
+    low, high = _open_bounds(min_amount, max_amount)
+    row_amounts = index['row_amounts']
+
+    if region:
+        region_positions = index['by_region'].get(region, [])
+        # --- Walk the smaller side, checking the other filter per row ---
+        if len(region_positions) <= hi - lo:
+            return [pos for pos in region_positions if low <= row_amounts[pos] <= high]
+        rows = index['transactions']
+        return sorted(pos for pos in index['amount_order'][lo:hi] if rows[pos]['Region'] == region)
+
+    # Wide ranges: a scan in row order needs no sort of the matches
+    if hi - lo > SCAN_FRACTION * len(row_amounts):
+        return [pos for pos, amount in enumerate(row_amounts) if low <= amount <= high]
+    return sorted(index['amount_order'][lo:hi])
+
+
+def filter_transactions(transactions, region=None, min_amount=None, max_amount=None):
+    """
+    Filters transactions by region and/or amount range.
+
+    transactions may be a list, filtered with one linear scan, or an index
+    from build_transaction_index; pass the index when running several
+    filters over the same data.
+
+    Returns: matching transactions in their original order
+    """
+
+    if isinstance(transactions, dict):
+        rows = transactions['transactions']
+        return [rows[pos] for pos in query_positions(transactions, region, min_amount, max_amount)]
+
+    low, high = _open_bounds(min_amount, max_amount)
+    return [
+        t for t in transactions
+        if (not region or t['Region'] == region)
+        and low <= t['Quantity'] * t['UnitPrice'] <= high
+    ]
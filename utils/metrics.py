@@ -0,0 +1,162 @@
+import cProfile
+import io
+import json
+import os
+import pstats
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+
+def new_run_metrics(trace_memory=False, profile_stage=None, profile_dir="output"):
+    """
+    Creates the metrics record for one pipeline run.
+
+    trace_memory=True measures the peak Python allocation of every stage
+    with tracemalloc (slower). Otherwise each stage records its RSS change
+    (rss_delta_bytes) and the process high-water mark so far
+    (process_peak_rss_bytes); the latter never goes down, so it only
+    points at a stage when that stage set a new peak.
+    profile_stage names a stage to run under cProfile.
+    """
+
+    if trace_memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+
+    return {
+        'started_at': time.strftime("%Y-%m-%d %H:%M:%S"),
+        'python': sys.version.split()[0],
+        'trace_memory': trace_memory,
+        'profile_stage': profile_stage,
+        'profile_dir': profile_dir,
+        'stages': []
+    }
+
+
+def _current_rss_bytes():
+    """
+    Current resident set size of this process, or None if unknown (only
+    read from /proc, i.e. on Linux).
+    """
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+def _peak_rss_bytes():
+    """
+    Peak resident set size of this process so far, or None if unknown.
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is bytes on macOS, kilobytes elsewhere
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+@contextmanager
+def track_stage(metrics, name, rows=None, parent=None):
+    """
+    Records wall time, CPU time, peak memory and throughput of a block.
+
+    Yields the stage record; set record['rows'] inside the block when the
+    row count is only known afterwards. With parent (a stage record), the
+    block is recorded as one of its functions instead of a top-level stage.
+    """
+
+    record = {'name': name, 'rows': rows}
+    profiler = None
+
+    if metrics['profile_stage'] == name:
+        profiler = cProfile.Profile()
+
+    if metrics['trace_memory']:
+        # Keep the parent's peak before a nested stage resets the counter
+        if parent is not None:
+            parent['_peak_seen'] = max(
+                parent.get('_peak_seen', 0), tracemalloc.get_traced_memory()[1]
+            )
+        tracemalloc.reset_peak()
+        memory_start = tracemalloc.get_traced_memory()[0]
+    else:
+        rss_start = _current_rss_bytes()
+
+    wall, cpu = time.perf_counter(), time.process_time()
+    if profiler:
+        profiler.enable()
+
+    try:
+        yield record
+    finally:
+        if profiler:
+            profiler.disable()
+        wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+
+        record['wall_s'] = round(wall, 6)
+        record['cpu_s'] = round(cpu, 6)
+
+        if metrics['trace_memory']:
+            peak = max(tracemalloc.get_traced_memory()[1], record.pop('_peak_seen', 0))
+            record['peak_mem_bytes'] = peak - memory_start
+        else:
+            rss_end = _current_rss_bytes()
+            record['rss_delta_bytes'] = (
+                rss_end - rss_start if rss_start is not None and rss_end is not None else None
+            )
+            record['process_peak_rss_bytes'] = _peak_rss_bytes()
+
+        rows = record['rows']
+        record['rows_per_s'] = round(rows / wall) if rows and wall > 0 else None
+
+        if profiler:
+            record['profile'] = _save_profile(profiler, metrics['profile_dir'], name)
+
+        if parent is not None:
+            parent.setdefault('functions', []).append(record)
+        else:
+            metrics['stages'].append(record)
+
+
+def _save_profile(profiler, directory, name):
+    """
+    Dumps cProfile stats for a stage and returns the file path.
+
+    The top functions by cumulative time are also written next to it as
+    text.
+    """
+
+    os.makedirs(directory, exist_ok=True)
+    safe_name = "".join(c if c.isalnum() else "_" for c in name)
+    path = os.path.join(directory, f"profile_{safe_name}.prof")
+    profiler.dump_stats(path)
+
+    text = io.StringIO()
+    pstats.Stats(profiler, stream=text).sort_stats("cumulative").print_stats(25)
+    with open(path[:-len(".prof")] + ".txt", "w", encoding="utf-8") as f:
+        f.write(text.getvalue())
+
+    return path
+
+
+def save_metrics(metrics, filename="output/run_metrics.json"):
+    """
+    Writes the run metrics as JSON.
+    """
+
+    directory = os.path.dirname(filename)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    metrics = dict(metrics)
+    metrics['total_wall_s'] = round(sum(s['wall_s'] for s in metrics['stages']), 6)
+
+    with open(filename, "w", encoding="utf-8") as f:
+        json.dump(metrics, f, indent=2)
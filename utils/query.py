@@ -0,0 +1,222 @@
+QUERY_FIELDS = ('Quantity', 'UnitPrice', 'Amount')
+QUERY_AGGREGATES = ('sum', 'count', 'avg', 'min', 'max')
+
+DEFAULT_MEASURES = {'transactions': 'count', 'revenue': 'sum:Amount'}
+
+
+def new_query_engine(transactions, fields=QUERY_FIELDS):
+    """
+    Wraps loaded (or enriched) transactions for ad-hoc group-by queries.
+
+    fields are the numeric columns measures can use; 'Amount' is derived
+    as Quantity * UnitPrice, and enrichment fields such as API_Rating can
+    be added. Every grouping computed is memoized, so later queries on the
+    same or fewer dimensions are answered from it without a scan.
+
+    Returns: engine dict
+    """
+    return {
+        'transactions': transactions,
+        'fields': tuple(fields),
+        'groupings': {},
+        'stats': {'scans': 0, 'rollups': 0, 'hits': 0}
+    }
+
+
+def _new_group(fields):
+    """
+    Creates the mergeable partial stats of one group.
+    """
+    return {
+        'rows': 0,
+        'fields': {f: {'sum': 0, 'count': 0, 'min': None, 'max': None} for f in fields}
+    }
+
+
+def _fold_value(stats, value):
+    """
+    Adds one value to a field's sum / count / min / max.
+    """
+    stats['sum'] += value
+    stats['count'] += 1
+    if stats['min'] is None or value < stats['min']:
+        stats['min'] = value
+    if stats['max'] is None or value > stats['max']:
+        stats['max'] = value
+
+
+def _merge_group(group, other):
+    """
+    Folds the partial stats of other into group.
+    """
+    group['rows'] += other['rows']
+    for field, stats in other['fields'].items():
+        current = group['fields'][field]
+        current['sum'] += stats['sum']
+        current['count'] += stats['count']
+        for bound, better in (('min', min), ('max', max)):
+            if stats[bound] is not None:
+                current[bound] = (
+                    stats[bound] if current[bound] is None
+                    else better(current[bound], stats[bound])
+                )
+
+
+def _scan(engine, dims):
+    """
+    Groups the rows by dims in one pass.
+    """
+
+    fields = engine['fields']
+    groups = {}
+
+    for t in engine['transactions']:
+        key = tuple(t.get(d) for d in dims)
+        group = groups.get(key)
+        if group is None:
+            group = groups[key] = _new_group(fields)
+        group['rows'] += 1
+
+        for field in fields:
+            if field == 'Amount':
+                value = t['Quantity'] * t['UnitPrice']
+            else:
+                value = t.get(field)
+                if value is None:
+                    continue
+            _fold_value(group['fields'][field], value)
+
+    engine['stats']['scans'] += 1
+    return groups
+
+
+def _rollup(engine, source_dims, groups, dims):
+    """
+    Re-groups a finer memoized grouping onto a subset of its dimensions.
+    """
+
+    positions = [source_dims.index(d) for d in dims]
+    rolled = {}
+
+    for key, group in groups.items():
+        coarse = tuple(key[p] for p in positions)
+        current = rolled.get(coarse)
+        if current is None:
+            current = rolled[coarse] = _new_group(engine['fields'])
+        _merge_group(current, group)
+
+    engine['stats']['rollups'] += 1
+    return rolled
+
+
+def _grouping(engine, dims):
+    """
+    Finds or computes the grouping for a set of dimensions.
+
+    Groupings are memoized under their sorted dimensions. A miss is rolled
+    up from the smallest memoized grouping over a superset of dims, and
+    only scans the rows when there is none.
+    """
+
+    dims = tuple(sorted(set(dims)))
+    groupings = engine['groupings']
+
+    if dims in groupings:
+        engine['stats']['hits'] += 1
+        return dims, groupings[dims]
+
+    finer = [
+        (len(groups), cached_dims, groups)
+        for cached_dims, groups in groupings.items()
+        if set(dims) <= set(cached_dims)
+    ]
+
+    if finer:
+        _, cached_dims, groups = min(finer, key=lambda x: x[0])
+        groups = _rollup(engine, cached_dims, groups, dims)
+    else:
+        groups = _scan(engine, dims)
+
+    groupings[dims] = groups
+    return dims, groups
+
+
+def _parse_measure(spec, fields):
+    """
+    Parses a measure spec such as 'count', 'sum:Amount' or 'avg:UnitPrice'.
+
+    Returns: (aggregate, field)
+    """
+
+    agg, _, field = spec.partition(":")
+    if agg not in QUERY_AGGREGATES:
+        raise ValueError(f"Unknown aggregate {agg!r}; use one of {QUERY_AGGREGATES}")
+    if agg == 'count' and not field:
+        return agg, None
+    if field not in fields:
+        raise ValueError(f"Field {field!r} is not a query field {fields}")
+    return agg, field
+
+
+def _measure_value(group, agg, field):
+    """
+    Computes one measure from a group's partial stats.
+    """
+
+    if field is None:
+        return group['rows']
+
+    stats = group['fields'][field]
+    if agg == 'avg':
+        return stats['sum'] / stats['count'] if stats['count'] else None
+    return stats[agg]
+
+
+def group_by(engine, dims, measures=None, sort_by=None, descending=True, limit=None):
+    """
+    Groups the engine's rows by any combination of dimensions (e.g.
+    ('Region',), ('API_Category', 'Region'), ('Date', 'ProductName')).
+
+    measures maps output names to specs: 'count' (rows), or
+    'sum|count|avg|min|max:<field>' over the engine's fields. Defaults to
+    transaction count and revenue. sort_by names a measure to order by;
+    limit keeps the first n groups.
+
+    Returns: {key: {measure: value}}; key is the dimension value for one
+    dimension, else a tuple in the order of dims
+    """
+
+    dims = tuple(dims)
+    if not dims:
+        raise ValueError("group_by needs at least one dimension")
+
+    measures = measures or DEFAULT_MEASURES
+    parsed = {
+        name: _parse_measure(spec, engine['fields'])
+        for name, spec in measures.items()
+    }
+
+    cached_dims, groups = _grouping(engine, dims)
+    order = [cached_dims.index(d) for d in dims]
+
+    result = {}
+    for key, group in groups.items():
+        out_key = tuple(key[p] for p in order)
+        result[out_key[0] if len(dims) == 1 else out_key] = {
+            name: _measure_value(group, agg, field)
+            for name, (agg, field) in parsed.items()
+        }
+
+    if sort_by is not None:
+        if sort_by not in parsed:
+            raise ValueError(f"sort_by must be one of the measures {list(parsed)}")
+        # None values (e.g. avg of a field with no values) sort last
+        present = [item for item in result.items() if item[1][sort_by] is not None]
+        missing = [item for item in result.items() if item[1][sort_by] is None]
+        present.sort(key=lambda x: x[1][sort_by], reverse=descending)
+        result = dict(present + missing)
+
+    if limit is not None:
+        result = dict(list(result.items())[:limit])
+
+    return result
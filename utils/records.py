@@ -0,0 +1,114 @@
+import sys
+from collections.abc import MutableMapping
+
+
+SALES_FIELDS = (
+    'TransactionID', 'Date', 'ProductID', 'ProductName',
+    'Quantity', 'UnitPrice', 'CustomerID', 'Region'
+)
+
+ENRICHMENT_FIELDS = ('API_Category', 'API_Brand', 'API_Rating', 'API_Match')
+
+_FIELD_SET = frozenset(SALES_FIELDS + ENRICHMENT_FIELDS)
+
+
+class SalesRecord(MutableMapping):
+    """
+    Compact, slotted transaction record with dict-style access.
+
+    Holds the parsed sales fields plus the enrichment fields in fixed
+    slots, so a row costs one small object instead of a dict. Supports
+    t['Region'], t.get(...), 'API_Match' in t, t.copy() and dict(t), so it
+    can stand in for the transaction dicts everywhere.
+    """
+
+    __slots__ = SALES_FIELDS + ENRICHMENT_FIELDS
+
+    def __init__(self, *args, **kwargs):
+        for key, value in dict(*args, **kwargs).items():
+            self[key] = value
+
+    def __getitem__(self, key):
+        if key not in _FIELD_SET:
+            raise KeyError(key)
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def __setitem__(self, key, value):
+        if key not in _FIELD_SET:
+            raise KeyError(f"SalesRecord has no field {key!r}")
+        setattr(self, key, value)
+
+    def __delitem__(self, key):
+        if key not in _FIELD_SET:
+            raise KeyError(key)
+        try:
+            delattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def __iter__(self):
+        for key in self.__slots__:
+            if hasattr(self, key):
+                yield key
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __contains__(self, key):
+        return key in _FIELD_SET and hasattr(self, key)
+
+    def get(self, key, default=None):
+        if key not in _FIELD_SET:
+            return default
+        return getattr(self, key, default)
+
+    def copy(self):
+        record = SalesRecord.__new__(SalesRecord)
+        for key in self:
+            setattr(record, key, getattr(self, key))
+        return record
+
+    def __getstate__(self):
+        return {key: getattr(self, key) for key in self}
+
+    def __setstate__(self, state):
+        for key, value in state.items():
+            setattr(self, key, value)
+
+    def __repr__(self):
+        return f"SalesRecord({dict(self)!r})"
+
+
+def make_sales_record(fields):
+    """
+    Builds a SalesRecord from parse_line output.
+
+    The low-cardinality text fields are interned, so every row that names
+    the same region, product, customer or date shares one string.
+    """
+
+    (
+        transaction_id,
+        date,
+        product_id,
+        product_name,
+        quantity,
+        unit_price,
+        customer_id,
+        region
+    ) = fields
+
+    record = SalesRecord.__new__(SalesRecord)
+    record.TransactionID = transaction_id
+    record.Date = sys.intern(date)
+    record.ProductID = sys.intern(product_id)
+    record.ProductName = sys.intern(product_name)
+    record.Quantity = quantity
+    record.UnitPrice = unit_price
+    record.CustomerID = sys.intern(customer_id)
+    record.Region = sys.intern(region)
+
+    return record
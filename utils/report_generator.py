@@ -0,0 +1,139 @@
+import os
+from datetime import datetime
+
+from utils.data_processor import aggregate_sales, analyze_sales
+from utils.segments import new_enrichment_summary, update_enrichment_summary
+
+
+def _money(amount):
+    """
+    Formats an amount in rupees.
+    """
+    return f"₹{amount:,.2f}"
+
+
+def _section(title):
+    """
+    Formats a report section heading.
+    """
+    return ["", title, "-" * 60]
+
+
+def generate_sales_report(transactions, enriched_transactions,
+                          output_file='output/sales_report.txt', aggregates=None,
+                          enrichment=None):
+    """
+    Generates the formatted text sales report.
+
+    aggregates (from aggregate_sales) can be passed to reuse the analysis
+    pass instead of scanning transactions again, and enrichment (e.g. from
+    product_dimension_summary) instead of counting the enriched rows.
+
+    Returns: output file path
+    """
+
+    if aggregates is None:
+        aggregates = aggregate_sales(transactions)
+    if enrichment is None:
+        enrichment = update_enrichment_summary(new_enrichment_summary(), enriched_transactions)
+
+    return write_sales_report(aggregates, enrichment, output_file)
+
+
+def write_sales_report(aggregates, enrichment, output_file='output/sales_report.txt',
+                       title="SALES ANALYTICS REPORT"):
+    """
+    Writes the formatted text sales report from an aggregate state and an
+    enrichment summary (see utils.segments), without touching any rows.
+
+    Returns: output file path
+    """
+
+    analysis = analyze_sales(aggregates, n=5)
+
+    total_revenue = analysis['total_revenue']
+    count = aggregates['transaction_count']
+    dates = list(analysis['daily_trend'])
+
+    lines = [
+        "=" * 60,
+        f"{title:^60}".rstrip(),
+        f"        Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}",
+        f"        Records Processed: {count}",
+        "=" * 60
+    ]
+
+    # --- Overall summary ---
+    lines += _section("OVERALL SUMMARY")
+    lines.append(f"Total Revenue:        {_money(total_revenue)}")
+    lines.append(f"Total Transactions:   {count}")
+    avg = total_revenue / count if count else 0.0
+    lines.append(f"Average Order Value:  {_money(avg)}")
+    if dates:
+        lines.append(f"Date Range:           {dates[0]} to {dates[-1]}")
+
+    # --- Region-wise performance ---
+    lines += _section("REGION-WISE PERFORMANCE")
+    lines.append(f"{'Region':<10}{'Sales':>18}{'% of Total':>12}{'Transactions':>15}")
+    for region, stats in analysis['region_sales'].items():
+        lines.append(
+            f"{region:<10}{_money(stats['total_sales']):>18}"
+            f"{stats['percentage']:>11.2f}%{stats['transaction_count']:>15}"
+        )
+
+    # --- Top products ---
+    lines += _section("TOP 5 PRODUCTS")
+    lines.append(f"{'Rank':<6}{'Product':<28}{'Quantity':>10}{'Revenue':>16}")
+    for rank, (name, qty, revenue) in enumerate(analysis['top_products'], 1):
+        lines.append(f"{rank:<6}{name:<28}{qty:>10}{_money(revenue):>16}")
+
+    # --- Top customers ---
+    lines += _section("TOP 5 CUSTOMERS")
+    lines.append(f"{'Rank':<6}{'Customer':<12}{'Total Spent':>18}{'Orders':>8}")
+    for rank, (cid, stats) in enumerate(analysis['customers'].items(), 1):
+        lines.append(
+            f"{rank:<6}{cid:<12}{_money(stats['total_spent']):>18}{stats['purchase_count']:>8}"
+        )
+
+    # --- Daily trend ---
+    lines += _section("DAILY SALES TREND")
+    lines.append(f"{'Date':<12}{'Revenue':>18}{'Transactions':>14}{'Customers':>11}")
+    for date, stats in analysis['daily_trend'].items():
+        lines.append(
+            f"{date:<12}{_money(stats['revenue']):>18}"
+            f"{stats['transaction_count']:>14}{stats['unique_customers']:>11}"
+        )
+
+    # --- Product performance ---
+    lines += _section("PRODUCT PERFORMANCE ANALYSIS")
+    peak = analysis['peak_day']
+    if peak:
+        lines.append(f"Best Selling Day: {peak[0]} ({_money(peak[1])}, {peak[2]} transactions)")
+    if analysis['low_products']:
+        lines.append("Low Performing Products:")
+        for name, qty, revenue in analysis['low_products']:
+            lines.append(f"  - {name}: {qty} units, {_money(revenue)}")
+    else:
+        lines.append("Low Performing Products: none")
+
+    # --- API enrichment ---
+    lines += _section("API ENRICHMENT SUMMARY")
+    total = enrichment['total']
+    rate = (enrichment['enriched'] / total) * 100 if total else 0.0
+    lines.append(f"Transactions Enriched: {enrichment['enriched']}/{total}")
+    lines.append(f"Success Rate: {rate:.1f}%")
+    unmatched = sorted(pid for pid in enrichment['unmatched'] if pid)
+    if unmatched:
+        lines.append("Products Not Enriched: " + ", ".join(unmatched))
+
+    lines.append("")
+
+    # Ensure output directory exists
+    directory = os.path.dirname(output_file)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    with open(output_file, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines))
+
+    return output_file
@@ -0,0 +1,152 @@
+import hashlib
+import json
+import os
+import pickle
+
+
+RESULT_CACHE_DIR = "data/result_cache"
+RESULT_CACHE_MAX_BYTES = 256 * 1024 * 1024
+RESULT_CACHE_VERSION = 4
+
+
+def file_digest(filename, chunk_size=1 << 20):
+    """
+    Computes the sha256 of a file's contents.
+    """
+
+    digest = hashlib.sha256()
+    with open(filename, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def result_cache_key(*parts):
+    """
+    Builds a content address from JSON-serializable parts, e.g. an input
+    digest, the filter options and the product catalog.
+    """
+    payload = json.dumps([RESULT_CACHE_VERSION, *parts], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _entry_path(key, cache_dir):
+    """
+    Path of the cache file holding key.
+    """
+    return os.path.join(cache_dir, f"{key}.pkl")
+
+
+def load_cached_result(key, cache_dir=RESULT_CACHE_DIR):
+    """
+    Loads the result stored under key.
+
+    A hit refreshes the entry's modification time so eviction drops the
+    least recently used entries first. Unreadable entries count as misses.
+
+    Returns: stored result, or None on a miss
+    """
+
+    path = _entry_path(key, cache_dir)
+    try:
+        with open(path, "rb") as f:
+            result = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+        return None
+
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+    return result
+
+
+def save_cached_result(key, result, cache_dir=RESULT_CACHE_DIR,
+                       max_bytes=RESULT_CACHE_MAX_BYTES, keep=()):
+    """
+    Stores result under key, then evicts old entries to stay within
+    max_bytes. The entry is written to a temporary file and renamed, so a
+    crash never leaves a truncated entry behind.
+
+    keep lists entry paths that must survive the eviction, e.g. the
+    entries saved earlier in the same run; the new entry always does.
+
+    Returns: entry path
+    """
+
+    os.makedirs(cache_dir, exist_ok=True)
+    path = _entry_path(key, cache_dir)
+    tmp_path = path + ".tmp"
+
+    with open(tmp_path, "wb") as f:
+        pickle.dump(result, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
+
+    evict_result_cache(cache_dir, max_bytes, keep={path, *keep})
+    return path
+
+
+def evict_result_cache(cache_dir=RESULT_CACHE_DIR, max_bytes=RESULT_CACHE_MAX_BYTES,
+                       keep=()):
+    """
+    Deletes least recently used entries until the cache fits in max_bytes.
+    Entries whose path is in keep are never evicted, even if the cache
+    stays above max_bytes.
+
+    Returns: number of entries removed
+    """
+
+    entries = []
+    for name in os.listdir(cache_dir) if os.path.isdir(cache_dir) else ():
+        if not name.endswith(".pkl"):
+            continue
+        path = os.path.join(cache_dir, name)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, path))
+
+    total = sum(size for _, size, _ in entries)
+    removed = 0
+
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        if path in keep:
+            continue
+        try:
+            os.remove(path)
+        except OSError:
+            continue
+        total -= size
+        removed += 1
+
+    return removed
+
+
+def restore_artifacts(artifacts):
+    """
+    Writes cached output files ({path: bytes}) back to disk.
+    """
+
+    for path, content in artifacts.items():
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(content)
+
+
+def read_artifacts(paths):
+    """
+    Reads output files so they can be cached.
+
+    Returns: {path: bytes}
+    """
+
+    artifacts = {}
+    for path in paths:
+        with open(path, "rb") as f:
+            artifacts[path] = f.read()
+    return artifacts
@@ -0,0 +1,230 @@
+import json
+import os
+
+from utils.data_processor import (
+    analyze_sales,
+    new_sales_aggregates,
+    update_sales_aggregates
+)
+
+
+# Rows buffered per segment before they are folded into its aggregates
+SEGMENT_BATCH_SIZE = 4096
+
+
+def make_segment(name, region=None, min_amount=None, max_amount=None,
+                 max_exclusive=False):
+    """
+    Creates a named filter/segment spec.
+
+    Amounts must be >= min_amount and <= max_amount, or < max_amount with
+    max_exclusive (used for amount bands, so adjacent bands never share a
+    row).
+    """
+    return {
+        'name': name,
+        'region': region or None,
+        'min_amount': min_amount,
+        'max_amount': max_amount,
+        'max_exclusive': max_exclusive
+    }
+
+
+def parse_segment_spec(text):
+    """
+    Parses a segment spec of the form NAME:region=North,min=1000,max=5000.
+
+    Every filter is optional; 'NAME' alone matches all rows.
+    """
+
+    name, _, filters = text.partition(":")
+    options = {}
+
+    for item in filter(None, (part.strip() for part in filters.split(","))):
+        key, _, value = item.partition("=")
+        key = key.strip().lower()
+        if key == "region":
+            options['region'] = value.strip()
+        elif key in ("min", "min_amount"):
+            options['min_amount'] = float(value)
+        elif key in ("max", "max_amount"):
+            options['max_amount'] = float(value)
+        else:
+            raise ValueError(f"Unknown segment filter '{key}' in '{text}'")
+
+    return make_segment(name.strip(), **options)
+
+
+def load_segment_file(filename):
+    """
+    Loads segment specs from a JSON file: a list of objects with name and
+    optional region, min_amount and max_amount.
+    """
+
+    with open(filename, "r", encoding="utf-8") as f:
+        specs = json.load(f)
+
+    return [
+        make_segment(
+            spec['name'], spec.get('region'), spec.get('min_amount'), spec.get('max_amount'),
+            spec.get('max_exclusive', False)
+        )
+        for spec in specs
+    ]
+
+
+def parse_amount_band(text):
+    """
+    Parses an amount band such as 1000-5000, 1000- or -5000. Bands are
+    half-open: 1000-5000 means 1000 <= amount < 5000.
+
+    Returns: (min_amount, max_amount), None for an open end
+    """
+    low, _, high = text.partition("-")
+    return (float(low) if low else None, float(high) if high else None)
+
+
+def cross_segments(regions, amount_bands):
+    """
+    Builds one segment per region × amount band combination.
+
+    regions and amount_bands may be empty, in which case that dimension is
+    not split. Bands are half-open (see parse_amount_band), so 0-1000 and
+    1000- split the rows without overlap.
+    """
+
+    segments = []
+    for region in regions or [None]:
+        for band in amount_bands or [None]:
+            min_amount, max_amount = parse_amount_band(band) if band else (None, None)
+            name = "_".join(part for part in (region, band) if part) or "all"
+            segments.append(make_segment(
+                name, region, min_amount, max_amount, max_exclusive=max_amount is not None
+            ))
+    return segments
+
+
+def new_enrichment_summary():
+    """
+    Creates the enrichment counters kept per segment.
+    """
+    return {'enriched': 0, 'total': 0, 'unmatched': set()}
+
+
+def update_enrichment_summary(summary, enriched_transactions):
+    """
+    Counts matched / unmatched enriched transactions into summary.
+    """
+    for t in enriched_transactions:
+        summary['total'] += 1
+        if t.get("API_Match"):
+            summary['enriched'] += 1
+        else:
+            summary['unmatched'].add(t.get("ProductID"))
+    return summary
+
+
+def aggregate_segments(transactions, segments, distinct='exact', precision=12,
+                       batch_size=SEGMENT_BATCH_SIZE):
+    """
+    Evaluates every segment in a single scan of transactions.
+
+    Segments are routed by region, so each row is only checked against
+    the segments that can match it, and each row's amount is computed
+    once. Matching rows are buffered per segment in small batches and
+    folded into that segment's aggregates, which keeps memory bounded when
+    transactions is a stream. Enriched rows also get per-segment
+    enrichment counts.
+
+    Returns: {name: {'segment', 'aggregates', 'enrichment'}} in segment order
+    """
+
+    results = {}
+    buffers = {}
+    by_region = {}
+    any_region = []
+
+    for segment in segments:
+        name = segment['name']
+        if name in results:
+            raise ValueError(f"Duplicate segment name: {name}")
+
+        results[name] = {
+            'segment': segment,
+            'aggregates': new_sales_aggregates(distinct, precision),
+            'enrichment': new_enrichment_summary()
+        }
+        buffers[name] = []
+
+        route = (
+            name, segment['min_amount'], segment['max_amount'],
+            segment.get('max_exclusive', False), buffers[name]
+        )
+        if segment['region']:
+            by_region.setdefault(segment['region'], []).append(route)
+        else:
+            any_region.append(route)
+
+    def flush(name):
+        rows = buffers[name]
+        update_sales_aggregates(results[name]['aggregates'], rows)
+        update_enrichment_summary(results[name]['enrichment'], rows)
+        rows.clear()
+
+    for t in transactions:
+        amount = t['Quantity'] * t['UnitPrice']
+
+        for routes in (by_region.get(t['Region'], ()), any_region):
+            for name, min_amount, max_amount, max_exclusive, rows in routes:
+                if min_amount is not None and amount < min_amount:
+                    continue
+                if max_amount is not None and (
+                        amount > max_amount or (max_exclusive and amount == max_amount)):
+                    continue
+
+                rows.append(t)
+                if len(rows) >= batch_size:
+                    flush(name)
+
+    for name in buffers:
+        flush(name)
+
+    return results
+
+
+def segment_file_name(name):
+    """
+    Makes a segment name safe to use in a file name.
+    """
+    return "".join(c if c.isalnum() or c in "-_." else "_" for c in name) or "segment"
+
+
+def save_segment_summary(results, filename="output/segments/segments.json"):
+    """
+    Writes the headline analytics of every segment as one JSON file.
+    """
+
+    summary = []
+    for name, result in results.items():
+        analysis = analyze_sales(result['aggregates'])
+        enrichment = result['enrichment']
+        summary.append({
+            'name': name,
+            'filters': {k: v for k, v in result['segment'].items() if k != 'name'},
+            'transaction_count': result['aggregates']['transaction_count'],
+            'total_revenue': analysis['total_revenue'],
+            'region_sales': analysis['region_sales'],
+            'top_products': analysis['top_products'],
+            'peak_day': analysis['peak_day'],
+            'enriched': enrichment['enriched'],
+            'unmatched_products': sorted(pid for pid in enrichment['unmatched'] if pid)
+        })
+
+    directory = os.path.dirname(filename)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    with open(filename, "w", encoding="utf-8") as f:
+        json.dump(summary, f, indent=2)
+
+    return filename
@@ -0,0 +1,231 @@
+import hashlib
+import heapq
+import math
+from array import array
+from bisect import bisect_left
+
+
+def new_space_saving(capacity=1000):
+    """
+    Creates an empty Space-Saving heavy-hitter sketch.
+
+    At most capacity keys are tracked. Every estimate overcounts the true
+    total by at most its recorded error, and any key whose true total is
+    above total_weight / capacity is guaranteed to be tracked.
+    """
+    return {
+        'capacity': capacity,
+        'total_weight': 0,
+        'counters': {},   # key → [estimate, error]
+        'heap': []        # (estimate, key) min-heap; stale entries skipped lazily
+    }
+
+
+def _space_saving_min(sketch):
+    """
+    Pops stale heap entries until the top is a live (estimate, key) pair.
+    """
+
+    heap = sketch['heap']
+    counters = sketch['counters']
+
+    while heap:
+        estimate, key = heap[0]
+        counter = counters.get(key)
+        if counter is not None and counter[0] == estimate:
+            return heap[0]
+        heapq.heappop(heap)
+
+    return None
+
+
+def space_saving_add(sketch, key, weight=1):
+    """
+    Adds weight to key in a Space-Saving sketch.
+    """
+
+    counters = sketch['counters']
+    heap = sketch['heap']
+    sketch['total_weight'] += weight
+
+    counter = counters.get(key)
+    if counter is not None:
+        counter[0] += weight
+    elif len(counters) < sketch['capacity']:
+        counter = counters[key] = [weight, 0]
+    else:
+        # --- Evict the smallest counter and inherit its count as error ---
+        min_estimate, min_key = _space_saving_min(sketch)
+        heapq.heappop(heap)
+        del counters[min_key]
+        counter = counters[key] = [min_estimate + weight, min_estimate]
+
+    heapq.heappush(heap, (counter[0], key))
+
+    # Keep the lazy heap bounded
+    if len(heap) > 4 * sketch['capacity']:
+        sketch['heap'] = [(c[0], k) for k, c in counters.items()]
+        heapq.heapify(sketch['heap'])
+
+
+def space_saving_top(sketch, n=10):
+    """
+    Returns the n heaviest keys of a Space-Saving sketch.
+
+    Returns: list of (key, estimate, error); the true total lies in
+    [estimate - error, estimate]
+    """
+
+    top = heapq.nlargest(n, sketch['counters'].items(), key=lambda x: x[1][0])
+    return [(key, estimate, error) for key, (estimate, error) in top]
+
+
+def new_hll(precision=12):
+    """
+    Creates an empty HyperLogLog distinct-count sketch.
+
+    Uses 2 ** precision registers; the relative standard error is about
+    1.04 / sqrt(2 ** precision) (1.6% at the default 12). Small sketches are
+    kept sparse, as a sorted array of packed 4-byte (index, rank) entries,
+    and switch to a dense register array at 2 ** precision / 16 entries, so
+    a sketch never takes more than a quarter of the dense size before that.
+    """
+
+    if not 4 <= precision <= 18:
+        raise ValueError("precision must be between 4 and 18")
+
+    return {'precision': precision, 'sparse': array('I'), 'registers': None}
+
+
+# Sparse entries pack a register index and its rank as idx << 6 | rank
+# (ranks are at most 61), so sorting by entry sorts by index
+RANK_BITS = 6
+RANK_MASK = (1 << RANK_BITS) - 1
+
+
+def hll_sparse_items(sparse):
+    """
+    Unpacks the sparse entries of a sketch.
+
+    Returns: iterator of (register index, rank)
+    """
+    return ((entry >> RANK_BITS, entry & RANK_MASK) for entry in sparse)
+
+
+def _hll_hash(value):
+    """
+    Stable 64-bit hash, so sketches built in different processes merge.
+    """
+    digest = hashlib.blake2b(str(value).encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'big')
+
+
+def _hll_densify(sketch):
+    """
+    Switches a sparse sketch to a dense register array.
+    """
+    registers = bytearray(1 << sketch['precision'])
+    for idx, rank in hll_sparse_items(sketch['sparse']):
+        registers[idx] = rank
+    sketch['registers'] = registers
+    sketch['sparse'] = None
+
+
+def _hll_set(sketch, idx, rank):
+    """
+    Raises register idx to at least rank.
+    """
+
+    registers = sketch['registers']
+    if registers is not None:
+        if rank > registers[idx]:
+            registers[idx] = rank
+        return
+
+    sparse = sketch['sparse']
+    key = idx << RANK_BITS
+    pos = bisect_left(sparse, key)
+    if pos < len(sparse) and sparse[pos] >> RANK_BITS == idx:
+        if rank > sparse[pos] & RANK_MASK:
+            sparse[pos] = key | rank
+        return
+
+    sparse.insert(pos, key | rank)
+    # 4 bytes per entry: past m / 16 entries the sparse form stops saving
+    # enough over one byte per register to be worth the slower updates
+    if len(sparse) > (1 << sketch['precision']) // 16:
+        _hll_densify(sketch)
+
+
+def hll_add(sketch, value):
+    """
+    Adds a value to a HyperLogLog sketch.
+    """
+
+    p = sketch['precision']
+    h = _hll_hash(value)
+    idx = h >> (64 - p)
+    rest = h & ((1 << (64 - p)) - 1)
+    rank = (64 - p) - rest.bit_length() + 1
+
+    _hll_set(sketch, idx, rank)
+
+
+def hll_merge(sketch, other):
+    """
+    Folds another sketch of the same precision into sketch.
+
+    Returns: the updated sketch
+    """
+
+    if sketch['precision'] != other['precision']:
+        raise ValueError("Cannot merge HyperLogLog sketches of different precision")
+
+    if other['registers'] is not None:
+        if sketch['registers'] is None:
+            _hll_densify(sketch)
+        registers = sketch['registers']
+        for idx, rank in enumerate(other['registers']):
+            if rank > registers[idx]:
+                registers[idx] = rank
+    else:
+        for idx, rank in hll_sparse_items(other['sparse']):
+            _hll_set(sketch, idx, rank)
+
+    return sketch
+
+
+def hll_copy(sketch):
+    """
+    Returns an independent copy of a sketch.
+    """
+    return {
+        'precision': sketch['precision'],
+        'sparse': None if sketch['sparse'] is None else array('I', sketch['sparse']),
+        'registers': None if sketch['registers'] is None else bytearray(sketch['registers'])
+    }
+
+
+def hll_count(sketch):
+    """
+    Estimates the number of distinct values added to a sketch.
+    """
+
+    m = 1 << sketch['precision']
+
+    if sketch['registers'] is not None:
+        ranks = sketch['registers']
+        zeros = ranks.count(0)
+    else:
+        ranks = [entry & RANK_MASK for entry in sketch['sparse']]
+        zeros = m - len(sketch['sparse'])
+
+    harmonic = zeros + sum(2.0 ** -rank for rank in ranks if rank)
+    alpha = {16: 0.673, 32: 0.697, 64: 0.709}.get(m, 0.7213 / (1 + 1.079 / m))
+    estimate = alpha * m * m / harmonic
+
+    # Small-range correction (linear counting)
+    if estimate <= 2.5 * m and zeros:
+        estimate = m * math.log(m / zeros)
+
+    return int(round(estimate))
@@ -0,0 +1,372 @@
+import heapq
+import sqlite3
+
+
+SALES_DB_FILE = "data/sales.db"
+INSERT_BATCH_SIZE = 10000
+IN_BATCH_SIZE = 500  # ids bound per IN (...) query
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS transactions (
+    source TEXT,
+    transaction_id TEXT,
+    date TEXT,
+    product_id TEXT,
+    product_key INTEGER,
+    product_name TEXT,
+    quantity INTEGER,
+    unit_price REAL,
+    amount REAL,
+    customer_id TEXT,
+    region TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_transactions_source ON transactions (source);
+CREATE INDEX IF NOT EXISTS idx_transactions_date ON transactions (date);
+CREATE INDEX IF NOT EXISTS idx_transactions_region ON transactions (region, date);
+CREATE INDEX IF NOT EXISTS idx_transactions_product ON transactions (product_name);
+CREATE INDEX IF NOT EXISTS idx_transactions_customer ON transactions (customer_id);
+CREATE INDEX IF NOT EXISTS idx_transactions_product_key ON transactions (product_key);
+
+CREATE TABLE IF NOT EXISTS products (
+    id INTEGER PRIMARY KEY,
+    title TEXT,
+    category TEXT,
+    brand TEXT,
+    rating REAL
+);
+"""
+
+
+def open_sales_db(filename=SALES_DB_FILE):
+    """
+    Opens (creating if needed) the SQLite sales store.
+
+    Returns: sqlite3 connection
+    """
+
+    conn = sqlite3.connect(filename)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def _product_key(product_id):
+    """
+    Numeric catalog ID of a ProductID (P101 → 101), or None.
+    """
+    digits = product_id[1:] if product_id else ""
+    return int(digits) if digits.isdigit() else None
+
+
+def load_transactions(conn, transactions, source=None, batch_size=INSERT_BATCH_SIZE):
+    """
+    Bulk-loads parsed transactions (from parse_transactions or a stream of
+    them) with batched inserts in one database transaction.
+
+    Rows loaded earlier under the same source (e.g. the input file name)
+    are replaced, so reloading a file is idempotent while other sources
+    accumulate as history.
+
+    Returns: number of rows loaded
+    """
+
+    keys = {}
+    count = 0
+
+    def rows():
+        nonlocal count
+        for t in transactions:
+            pid = t['ProductID']
+            # Parse each distinct ProductID once
+            if pid not in keys:
+                keys[pid] = _product_key(pid)
+            count += 1
+            yield (
+                source, t['TransactionID'], t['Date'], pid, keys[pid], t['ProductName'],
+                t['Quantity'], t['UnitPrice'], t['Quantity'] * t['UnitPrice'],
+                t['CustomerID'], t['Region']
+            )
+
+    insert = "INSERT INTO transactions VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+
+    with conn:
+        if source is not None:
+            conn.execute("DELETE FROM transactions WHERE source = ?", (source,))
+
+        batch = []
+        for row in rows():
+            batch.append(row)
+            if len(batch) >= batch_size:
+                conn.executemany(insert, batch)
+                batch.clear()
+        if batch:
+            conn.executemany(insert, batch)
+
+    return count
+
+
+def load_product_catalog(conn, product_mapping):
+    """
+    Loads (or refreshes) the product catalog from create_product_mapping.
+
+    Returns: number of products loaded
+    """
+
+    with conn:
+        conn.executemany(
+            "INSERT OR REPLACE INTO products VALUES (?, ?, ?, ?, ?)",
+            [
+                (pid, info.get("title"), info.get("category"), info.get("brand"), info.get("rating"))
+                for pid, info in product_mapping.items()
+            ]
+        )
+    return len(product_mapping)
+
+
+def _where(start=None, end=None, region=None):
+    """
+    Builds the WHERE clause for an optional date range and region.
+
+    Returns: (sql, params)
+    """
+
+    conditions, params = [], []
+    if start is not None:
+        conditions.append("date >= ?")
+        params.append(start)
+    if end is not None:
+        conditions.append("date <= ?")
+        params.append(end)
+    if region is not None:
+        conditions.append("region = ?")
+        params.append(region)
+
+    return (" WHERE " + " AND ".join(conditions) if conditions else ""), params
+
+
+# --- Analytics pushed down to SQL ---
+# Same results as the functions in utils/data_processor.py. Groups are
+# fetched in first-seen (rowid) order so ties rank the same way.
+# start / end (ISO dates, inclusive) and region limit every query.
+
+def db_total_revenue(conn, start=None, end=None, region=None):
+    """
+    SQL counterpart of calculate_total_revenue.
+    """
+    where, params = _where(start, end, region)
+    return conn.execute(
+        f"SELECT COALESCE(SUM(amount), 0.0) FROM transactions{where}", params
+    ).fetchone()[0]
+
+
+def db_region_wise_sales(conn, start=None, end=None, region=None):
+    """
+    SQL counterpart of region_wise_sales.
+    """
+
+    where, params = _where(start, end, region)
+    rows = conn.execute(
+        f"SELECT region, SUM(amount), COUNT(*) FROM transactions{where} "
+        "GROUP BY region ORDER BY MIN(rowid)",
+        params
+    ).fetchall()
+
+    overall_total = sum(total for _, total, _ in rows)
+
+    region_stats = {
+        name: {
+            'total_sales': total,
+            'transaction_count': count,
+            'percentage': round((total / overall_total) * 100, 2) if overall_total > 0 else 0.0
+        }
+        for name, total, count in rows
+    }
+
+    # --- Sort by total_sales descending ---
+    return dict(
+        sorted(region_stats.items(), key=lambda x: x[1]['total_sales'], reverse=True)
+    )
+
+
+def db_product_stats(conn, start=None, end=None, region=None):
+    """
+    Per-product totals.
+
+    Returns: list of (ProductName, total_qty, total_revenue) in first-seen order
+    """
+    where, params = _where(start, end, region)
+    return conn.execute(
+        f"SELECT product_name, SUM(quantity), SUM(amount) FROM transactions{where} "
+        "GROUP BY product_name ORDER BY MIN(rowid)",
+        params
+    ).fetchall()
+
+
+def db_top_selling_products(conn, n=5, start=None, end=None, region=None):
+    """
+    SQL counterpart of top_selling_products.
+    """
+    products = db_product_stats(conn, start, end, region)
+    return heapq.nlargest(n, products, key=lambda x: x[1])
+
+
+def db_low_performing_products(conn, threshold=10, start=None, end=None, region=None):
+    """
+    SQL counterpart of low_performing_products.
+    """
+    low_products = [p for p in db_product_stats(conn, start, end, region) if p[1] < threshold]
+    low_products.sort(key=lambda x: x[1])
+    return low_products
+
+
+def db_customer_analysis(conn, n=None, start=None, end=None, region=None):
+    """
+    SQL counterpart of customer_analysis.
+    """
+
+    where, params = _where(start, end, region)
+    rows = conn.execute(
+        f"SELECT customer_id, SUM(amount), COUNT(*) FROM transactions{where} "
+        "GROUP BY customer_id ORDER BY MIN(rowid)",
+        params
+    ).fetchall()
+
+    # --- Order by total_spent descending ---
+    if n is None:
+        rows.sort(key=lambda x: x[1], reverse=True)
+    else:
+        rows = heapq.nlargest(n, rows, key=lambda x: x[1])
+
+    # --- Products bought, only for the customers returned ---
+    distinct = f"SELECT DISTINCT customer_id, product_name FROM transactions{where}"
+    if n is None:
+        queries = [(distinct, params)]
+    else:
+        # Chunked to stay under SQLite's bound-parameter limit
+        ids = [cid for cid, _, _ in rows]
+        chunks = (ids[i:i + IN_BATCH_SIZE] for i in range(0, len(ids), IN_BATCH_SIZE))
+        queries = [
+            (f"{distinct}{' AND' if where else ' WHERE'} customer_id IN "
+             f"({','.join('?' * len(chunk))})", params + chunk)
+            for chunk in chunks
+        ]
+
+    bought = {}
+    for sql, query_params in queries:
+        for cid, name in conn.execute(sql, query_params):
+            bought.setdefault(cid, []).append(name)
+
+    return {
+        cid: {
+            'total_spent': total,
+            'purchase_count': count,
+            'products_bought': sorted(bought.get(cid, [])),
+            'avg_order_value': round(total / count, 2) if count > 0 else 0.0
+        }
+        for cid, total, count in rows
+    }
+
+
+def db_daily_sales_trend(conn, start=None, end=None, region=None):
+    """
+    SQL counterpart of daily_sales_trend.
+    """
+
+    where, params = _where(start, end, region)
+    rows = conn.execute(
+        f"SELECT date, SUM(amount), COUNT(*), COUNT(DISTINCT customer_id) "
+        f"FROM transactions{where} GROUP BY date ORDER BY date",
+        params
+    )
+
+    return {
+        date: {
+            'revenue': revenue,
+            'transaction_count': count,
+            'unique_customers': customers
+        }
+        for date, revenue, count, customers in rows
+    }
+
+
+def db_peak_sales_day(conn, start=None, end=None, region=None):
+    """
+    SQL counterpart of find_peak_sales_day.
+    """
+
+    where, params = _where(start, end, region)
+    rows = conn.execute(
+        f"SELECT date, SUM(amount), COUNT(*) FROM transactions{where} "
+        "GROUP BY date ORDER BY MIN(rowid)",
+        params
+    ).fetchall()
+
+    if not rows:
+        return None  # no data
+
+    return max(rows, key=lambda x: x[1])
+
+
+# --- Enrichment join ---
+
+def db_enriched_transactions(conn, start=None, end=None, region=None):
+    """
+    Streams enriched rows, joining transactions to the product catalog in
+    SQL. Same fields as enrich_sales_data.
+    """
+
+    where, params = _where(start, end, region)
+    rows = conn.execute(
+        "SELECT t.transaction_id, t.date, t.product_id, t.product_name, t.quantity, "
+        "t.unit_price, t.customer_id, t.region, p.category, p.brand, p.rating, "
+        "p.id IS NOT NULL "
+        f"FROM (SELECT rowid, * FROM transactions{where}) t "
+        "LEFT JOIN products p ON p.id = t.product_key ORDER BY t.rowid",
+        params
+    )
+
+    for (tid, date, pid, name, qty, price, cid, reg,
+         category, brand, rating, matched) in rows:
+        yield {
+            "TransactionID": tid,
+            "Date": date,
+            "ProductID": pid,
+            "ProductName": name,
+            "Quantity": qty,
+            "UnitPrice": price,
+            "CustomerID": cid,
+            "Region": reg,
+            "API_Category": category,
+            "API_Brand": brand,
+            "API_Rating": rating,
+            "API_Match": bool(matched)
+        }
+
+
+def db_enrichment_summary(conn, start=None, end=None, region=None):
+    """
+    Match statistics of the enrichment join, computed in SQL.
+
+    Returns: {'enriched', 'total', 'unmatched': set of ProductIDs}, the
+    shape of utils.segments.new_enrichment_summary
+    """
+
+    where, params = _where(start, end, region)
+    subquery = f"(SELECT product_id, product_key FROM transactions{where}) t"
+
+    total, enriched = conn.execute(
+        f"SELECT COUNT(*), COUNT(p.id) FROM {subquery} "
+        "LEFT JOIN products p ON p.id = t.product_key",
+        params
+    ).fetchone()
+
+    unmatched = {
+        pid for (pid,) in conn.execute(
+            f"SELECT DISTINCT t.product_id FROM {subquery} "
+            "LEFT JOIN products p ON p.id = t.product_key WHERE p.id IS NULL",
+            params
+        )
+    }
+
+    return {'enriched': enriched, 'total': total, 'unmatched': unmatched}
@@ -0,0 +1,106 @@
+import os
+
+
+REQUIRED_FIELDS = [
+    'TransactionID', 'Date', 'ProductID', 'ProductName',
+    'Quantity', 'UnitPrice', 'CustomerID', 'Region'
+]
+
+# Declarative validation rules. Checks run in this order (all required
+# fields, then ID prefixes, then numeric rules) and the first failing one
+# gives the reject reason code.
+VALIDATION_SCHEMA = {
+    'required': REQUIRED_FIELDS,
+    'prefix': {'TransactionID': 'T', 'ProductID': 'P', 'CustomerID': 'C'},
+    'positive': ['Quantity', 'UnitPrice']
+}
+
+QUARANTINE_FILE = "output/quarantine.txt"
+QUARANTINE_FIELDS = ['Reason'] + REQUIRED_FIELDS
+
+
+def compile_schema(schema=VALIDATION_SCHEMA):
+    """
+    Compiles a validation schema into one straight-line check function.
+
+    The generated function reads each field once and returns at the first
+    failing rule, so a row costs a few local comparisons instead of a
+    generic loop over the rules. Reason codes are missing_<Field>,
+    bad_prefix_<Field> and not_positive_<Field>.
+
+    Returns: check(t) -> reason code, or None for a valid row
+    """
+
+    lines = ["def check(t):", "    get = t.get"]
+    names = {}
+
+    def value(field):
+        if field not in names:
+            names[field] = f"v{len(names)}"
+            lines.append(f"    {names[field]} = get({field!r})")
+        return names[field]
+
+    for field in schema.get('required', ()):
+        v = value(field)
+        lines.append(f"    if {v} is None or {v} == '': return {'missing_' + field!r}")
+
+    for field, prefix in schema.get('prefix', {}).items():
+        v = value(field)
+        lines.append(f"    if not {v}.startswith({prefix!r}): return {'bad_prefix_' + field!r}")
+
+    for field in schema.get('positive', ()):
+        v = value(field)
+        lines.append(f"    if {v} <= 0: return {'not_positive_' + field!r}")
+
+    lines.append("    return None")
+    source = "\n".join(lines)
+
+    namespace = {}
+    exec(compile(source, "<validation schema>", "exec"), namespace)
+    check = namespace["check"]
+    check.source = source
+    return check
+
+
+# Reason codes of rows that never parse into a transaction (see
+# utils.file_handler.line_reject_reason)
+MALFORMED_FIELD_COUNT = 'malformed_field_count'
+BAD_NUMBER_PREFIX = 'bad_number_'
+
+
+# Compiled once at import; used by the validation functions in file_handler
+check_transaction = compile_schema()
+
+
+def open_quarantine(filename=QUARANTINE_FILE):
+    """
+    Opens the quarantine file for rejected rows and writes its header.
+
+    Returns: open file object (use it as a context manager)
+    """
+
+    directory = os.path.dirname(filename)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    f = open(filename, "w", encoding="utf-8")
+    f.write("|".join(QUARANTINE_FIELDS) + "\n")
+    return f
+
+
+def write_quarantine(f, t, reason):
+    """
+    Appends one rejected row with its reason code to a quarantine file.
+    """
+    values = [reason] + ["" if t.get(k) is None else str(t.get(k)) for k in REQUIRED_FIELDS]
+    f.write("|".join(values) + "\n")
+
+
+def write_quarantine_line(f, line, reason):
+    """
+    Appends one raw line that could not be parsed, with its reason code.
+
+    The line is kept as read, so a malformed_field_count row has more or
+    fewer columns than the header.
+    """
+    f.write(f"{reason}|{line}\n")